@@ -14,6 +14,51 @@ class Config:
         self.DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///finintel.db')
         self.GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
         self.ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+        self.QUOTE_CACHE_TTL = int(os.getenv('QUOTE_CACHE_TTL', 60))
+        self.QUOTE_CACHE_SIZE = int(os.getenv('QUOTE_CACHE_SIZE', 512))
+        self.MARKET_REFRESH_ENABLED = os.getenv('MARKET_REFRESH_ENABLED', 'true').lower() == 'true'
+        self.MARKET_REFRESH_INTERVAL = int(os.getenv('MARKET_REFRESH_INTERVAL', 60))
+        self.MARKET_REFRESH_CLOSED_INTERVAL = int(os.getenv('MARKET_REFRESH_CLOSED_INTERVAL', 1800))
+        self.MARKET_DATA_PROVIDER = os.getenv('MARKET_DATA_PROVIDER', 'yfinance')
+        self.MARKET_REPLAY_DIR = os.getenv('MARKET_REPLAY_DIR')
+        self.MARKET_REPLAY_LATENCY_MS = float(os.getenv('MARKET_REPLAY_LATENCY_MS', 0))
+        self.PRICE_STORE_ENABLED = os.getenv('PRICE_STORE_ENABLED', 'true').lower() == 'true'
+        self.PRICE_STORE_PATH = os.getenv('PRICE_STORE_PATH')
+        self.PRICE_STORE_MAX_AGE = int(os.getenv('PRICE_STORE_MAX_AGE', 60))
+        self.CHART_CACHE_MAX_BYTES = int(os.getenv('CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        self.CHART_CACHE_DIR = os.getenv('CHART_CACHE_DIR')
+        self.CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', 2))
+        self.CHART_RENDER_QUEUE = int(os.getenv('CHART_RENDER_QUEUE', 8))
+        self.CHART_RENDER_TIMEOUT = float(os.getenv('CHART_RENDER_TIMEOUT', 20))
+        self.FINANCIAL_CONTEXT_TTL = int(os.getenv('FINANCIAL_CONTEXT_TTL', 300))
+        self.FINANCIAL_CONTEXT_CACHE_SIZE = int(os.getenv('FINANCIAL_CONTEXT_CACHE_SIZE', 256))
+        self.ADVICE_CACHE_TTL = int(os.getenv('ADVICE_CACHE_TTL', 6 * 3600))
+        self.ADVICE_CACHE_SIZE = int(os.getenv('ADVICE_CACHE_SIZE', 1024))
+        self.ADVICE_CACHE_PATH = os.getenv('ADVICE_CACHE_PATH')
+        self.PROMPT_CONTEXT_TOKENS = int(os.getenv('PROMPT_CONTEXT_TOKENS', 1500))
+        self.PROMPT_MAX_QUERY_TOKENS = int(os.getenv('PROMPT_MAX_QUERY_TOKENS', 500))
+        self.PROMPT_RECENT_EXPENSES = int(os.getenv('PROMPT_RECENT_EXPENSES', 20))
+        self.LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
+        self.LLM_MODEL = os.getenv('LLM_MODEL', 'gemini-2.0-flash-exp')
+        self.LLM_STUB_LATENCY_MS = float(os.getenv('LLM_STUB_LATENCY_MS', 500))
+        self.LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+        self.LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', 2))
+        self.LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 30))
+        self.LLM_RETRIES = int(os.getenv('LLM_RETRIES', 2))
+        self.LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', 5))
+        self.LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', 30))
+        self.PROMPT_HISTORY_TOKENS = int(os.getenv('PROMPT_HISTORY_TOKENS', 800))
+        self.CHAT_KEEP_TURNS = int(os.getenv('CHAT_KEEP_TURNS', 6))
+        self.CHAT_SUMMARIZE_BATCH = int(os.getenv('CHAT_SUMMARIZE_BATCH', 6))
+        self.CHAT_SUMMARY_MAX_CHARS = int(os.getenv('CHAT_SUMMARY_MAX_CHARS', 2000))
+        self.MONTE_CARLO_PATHS = int(os.getenv('MONTE_CARLO_PATHS', 10000))
+        self.MONTE_CARLO_MAX_PATHS = int(os.getenv('MONTE_CARLO_MAX_PATHS', 100000))
+        self.MONTE_CARLO_WORKERS = int(os.getenv('MONTE_CARLO_WORKERS', 0))
+        self.MONTE_CARLO_POOL_THRESHOLD = int(os.getenv('MONTE_CARLO_POOL_THRESHOLD', 50000))
+        self.ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', 900))
+        self.ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', 128))
+        self.ANALYTICS_ROLLING_DAYS = int(os.getenv('ANALYTICS_ROLLING_DAYS', 21))
+        self.MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))
 
 def create_app():
     app = Flask(__name__)
@@ -23,6 +68,7 @@ def create_app():
     app.config['SECRET_KEY'] = config.SECRET_KEY
     app.config['SQLALCHEMY_DATABASE_URI'] = config.DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_BYTES
 
     # Initialize extensions
     db.init_app(app)
@@ -47,17 +93,104 @@ def create_app():
     # Initialize services with config
     from src.services.financial import FinancialService
     from src.services.market_data import MarketDataService
+    from src.services.quote_cache import quote_cache
+    from src.services.market_providers import create_provider, set_provider
+    from src.services.price_store import PriceStore
+    from src.services.chart_cache import chart_cache
+    from src.services.chart_renderer import chart_render_pool
+    from src.services.financial_context import financial_context_cache
+    from src.services.advice_cache import advice_cache
+    from src.services.prompt_builder import prompt_builder
+    from src.services.llm_gateway import llm_gateway, create_model
+    from src.services.conversation import conversation_store
+    from src.services.goal_simulation import goal_simulator
+    from src.services.portfolio_analytics import portfolio_analytics
     
+    quote_cache.configure(ttl=config.QUOTE_CACHE_TTL, max_size=config.QUOTE_CACHE_SIZE)
+    chart_cache.configure(max_bytes=config.CHART_CACHE_MAX_BYTES, cache_dir=config.CHART_CACHE_DIR)
+    chart_render_pool.configure(
+        workers=config.CHART_RENDER_WORKERS,
+        max_queue=config.CHART_RENDER_QUEUE,
+        timeout=config.CHART_RENDER_TIMEOUT
+    )
+    prompt_builder.configure(
+        context_tokens=config.PROMPT_CONTEXT_TOKENS,
+        max_query_tokens=config.PROMPT_MAX_QUERY_TOKENS,
+        recent_items=config.PROMPT_RECENT_EXPENSES,
+        history_tokens=config.PROMPT_HISTORY_TOKENS
+    )
+    conversation_store.configure(
+        keep_turns=config.CHAT_KEEP_TURNS,
+        summarize_batch=config.CHAT_SUMMARIZE_BATCH,
+        max_summary_chars=config.CHAT_SUMMARY_MAX_CHARS
+    )
+    goal_simulator.configure(
+        paths=config.MONTE_CARLO_PATHS,
+        max_paths=config.MONTE_CARLO_MAX_PATHS,
+        workers=config.MONTE_CARLO_WORKERS,
+        pool_threshold=config.MONTE_CARLO_POOL_THRESHOLD
+    )
+    portfolio_analytics.configure(
+        ttl=config.ANALYTICS_CACHE_TTL,
+        max_size=config.ANALYTICS_CACHE_SIZE,
+        rolling_days=config.ANALYTICS_ROLLING_DAYS
+    )
+    financial_context_cache.configure(ttl=config.FINANCIAL_CONTEXT_TTL, max_size=config.FINANCIAL_CONTEXT_CACHE_SIZE)
+    advice_cache.configure(ttl=config.ADVICE_CACHE_TTL, max_size=config.ADVICE_CACHE_SIZE, db_path=config.ADVICE_CACHE_PATH)
+    provider = create_provider(
+        config.MARKET_DATA_PROVIDER,
+        replay_dir=config.MARKET_REPLAY_DIR,
+        replay_latency=config.MARKET_REPLAY_LATENCY_MS / 1000
+    )
+    if config.PRICE_STORE_ENABLED:
+        provider = PriceStore(
+            provider,
+            config.PRICE_STORE_PATH or os.path.join(app.instance_path, 'prices.sqlite3'),
+            max_age=config.PRICE_STORE_MAX_AGE
+        )
+    set_provider(provider)
+    llm_gateway.configure(
+        model=create_model(
+            config.LLM_PROVIDER,
+            api_key=config.GOOGLE_API_KEY,
+            model_name=config.LLM_MODEL,
+            stub_latency=config.LLM_STUB_LATENCY_MS / 1000
+        ),
+        max_concurrency=config.LLM_MAX_CONCURRENCY,
+        queue_timeout=config.LLM_QUEUE_TIMEOUT,
+        timeout=config.LLM_TIMEOUT,
+        retries=config.LLM_RETRIES,
+        failure_threshold=config.LLM_BREAKER_THRESHOLD,
+        reset_after=config.LLM_BREAKER_RESET
+    )
     financial_service = FinancialService(config)
-    market_service = MarketDataService()
+    market_service = MarketDataService(index_max_age=config.MARKET_REFRESH_CLOSED_INTERVAL * 2)
+    
+    # Keep quotes and indices warm in the background so requests read the snapshot
+    from src.services.market_refresher import MarketDataRefresher
+    market_refresher = MarketDataRefresher(
+        app,
+        market_service,
+        open_interval=config.MARKET_REFRESH_INTERVAL,
+        closed_interval=config.MARKET_REFRESH_CLOSED_INTERVAL
+    )
+    if config.MARKET_REFRESH_ENABLED:
+        # start with the first request, so only the process that serves runs it:
+        # not CLI commands (flask db upgrade, cron jobs) or the reloader's watcher process
+        @app.before_request
+        def start_market_refresher():
+            market_refresher.start()
     
     # Pass services to blueprints
     from src.routes.finance import init_services
-    init_services(financial_service, market_service)
+    init_services(financial_service, market_service, market_refresher)
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(finance_bp, url_prefix='/finance')
 
+    from src.commands import register_commands
+    register_commands(app)
+
     @app.route('/')
     def home():
         return render_template('home.html')
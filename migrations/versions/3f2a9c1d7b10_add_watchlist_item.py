@@ -0,0 +1,65 @@
+"""Add watchlist_item table and backfill from user.stock_tickers
+
+Revision ID: 3f2a9c1d7b10
+Revises: 
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # create_app() runs db.create_all(), so the table may already exist
+    if not sa.inspect(bind).has_table('watchlist_item'):
+        op.create_table(
+            'watchlist_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('ticker', sa.String(length=20), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'ticker', name='uq_watchlist_item_user_ticker')
+        )
+        op.create_index('ix_watchlist_item_ticker', 'watchlist_item', ['ticker'], unique=False)
+
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('stock_tickers', sa.String))
+    watchlist_item = sa.table(
+        'watchlist_item',
+        sa.column('user_id', sa.Integer),
+        sa.column('ticker', sa.String),
+        sa.column('created_at', sa.DateTime)
+    )
+    existing = set(bind.execute(sa.select(watchlist_item.c.user_id, watchlist_item.c.ticker)).all())
+    now = datetime.utcnow()
+    rows = []
+    for user_id, stock_tickers in bind.execute(sa.select(user.c.id, user.c.stock_tickers)).all():
+        for ticker in dict.fromkeys(t.strip().upper() for t in (stock_tickers or '').split(',') if t.strip()):
+            if (user_id, ticker) not in existing:
+                rows.append({'user_id': user_id, 'ticker': ticker, 'created_at': now})
+    if rows:
+        op.bulk_insert(watchlist_item, rows)
+
+
+def downgrade():
+    bind = op.get_bind()
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('stock_tickers', sa.String))
+    watchlist_item = sa.table('watchlist_item', sa.column('user_id', sa.Integer), sa.column('ticker', sa.String))
+    tickers = {}
+    for user_id, ticker in bind.execute(sa.select(watchlist_item.c.user_id, watchlist_item.c.ticker)).all():
+        tickers.setdefault(user_id, []).append(ticker)
+    for user_id, user_tickers in tickers.items():
+        bind.execute(user.update().where(user.c.id == user_id).values(stock_tickers=','.join(user_tickers)[:500]))
+
+    op.drop_index('ix_watchlist_item_ticker', table_name='watchlist_item')
+    op.drop_table('watchlist_item')
@@ -0,0 +1,76 @@
+"""Add monthly_spend rollup table and populate it from expense
+
+Revision ID: 8c4e2b7a91d3
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-18 11:10:00.000000
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b7a91d3'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('monthly_spend'):
+        op.create_table(
+            'monthly_spend',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('category', sa.String(length=50), nullable=False),
+            sa.Column('month', sa.Date(), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'category', 'month', name='uq_monthly_spend_user_category_month')
+        )
+
+    expense = sa.table(
+        'expense',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('category', sa.String),
+        sa.column('amount', sa.Float),
+        sa.column('date', sa.DateTime)
+    )
+    monthly_spend = sa.table(
+        'monthly_spend',
+        sa.column('user_id', sa.Integer),
+        sa.column('category', sa.String),
+        sa.column('month', sa.Date),
+        sa.column('total', sa.Float),
+        sa.column('count', sa.Integer)
+    )
+    year = sa.extract('year', expense.c.date)
+    month = sa.extract('month', expense.c.date)
+    totals = bind.execute(
+        sa.select(expense.c.user_id, expense.c.category, year, month,
+                  sa.func.sum(expense.c.amount), sa.func.count(expense.c.id))
+        .group_by(expense.c.user_id, expense.c.category, year, month)
+    ).all()
+
+    bind.execute(monthly_spend.delete())
+    rows = [
+        {
+            'user_id': user_id,
+            'category': category,
+            'month': date(int(row_year), int(row_month), 1),
+            'total': total,
+            'count': count
+        }
+        for user_id, category, row_year, row_month, total, count in totals
+    ]
+    if rows:
+        op.bulk_insert(monthly_spend, rows)
+
+
+def downgrade():
+    op.drop_table('monthly_spend')
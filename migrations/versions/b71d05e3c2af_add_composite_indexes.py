@@ -0,0 +1,37 @@
+"""Add composite indexes on expense, budget and goal for per-user queries
+
+Revision ID: b71d05e3c2af
+Revises: 8c4e2b7a91d3
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d05e3c2af'
+down_revision = '8c4e2b7a91d3'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_expense_user_date', 'expense', ['user_id', 'date'], ['amount']),
+    ('ix_expense_user_category_date', 'expense', ['user_id', 'category', 'date'], ['amount']),
+    ('ix_budget_user_month', 'budget', ['user_id', 'month'], []),
+    ('ix_goal_user_target_date', 'goal', ['user_id', 'target_date'], []),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, include in INDEXES:
+        # create_app() runs db.create_all(), which may have created them already
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, unique=False, postgresql_include=include)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
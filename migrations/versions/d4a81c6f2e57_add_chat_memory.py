@@ -0,0 +1,52 @@
+"""Add chat_turn and chat_summary tables for conversation memory
+
+Revision ID: d4a81c6f2e57
+Revises: b71d05e3c2af
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a81c6f2e57'
+down_revision = 'b71d05e3c2af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # create_app() runs db.create_all(), which may have created them already
+    if not inspector.has_table('chat_turn'):
+        op.create_table(
+            'chat_turn',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('role', sa.String(length=10), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_chat_turn_user_id', 'chat_turn', ['user_id', 'id'])
+
+    if not inspector.has_table('chat_summary'):
+        op.create_table(
+            'chat_summary',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=False),
+            sa.Column('turns_summarized', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id')
+        )
+
+
+def downgrade():
+    op.drop_table('chat_summary')
+    op.drop_index('ix_chat_turn_user_id', table_name='chat_turn')
+    op.drop_table('chat_turn')
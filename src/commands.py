@@ -0,0 +1,66 @@
+import click
+from flask.cli import AppGroup
+
+market_cli = AppGroup('market', help='Market data maintenance commands.')
+budget_cli = AppGroup('budget', help='Budget maintenance commands.')
+expenses_cli = AppGroup('expenses', help='Expense maintenance commands.')
+schema_cli = AppGroup('schema', help='Schema and query plan checks.')
+
+
+@market_cli.command('record')
+@click.argument('tickers', nargs=-1, required=True)
+@click.option('--data-dir', required=True, help='Directory to write recorded bars to.')
+@click.option('--period', default='1y', show_default=True, help='History to record, e.g. 1mo, 1y, max.')
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'parquet']), default='csv', show_default=True)
+def record_market_data(tickers, data_dir, period, file_format):
+    """Record daily OHLCV from Yahoo Finance for the replay provider."""
+    from src.services.market_providers import record_history
+    recorded = record_history([ticker.upper() for ticker in tickers], data_dir, period=period, file_format=file_format)
+    click.echo(f"Recorded {len(recorded)} tickers to {data_dir}")
+
+
+@budget_cli.command('check-alerts')
+def check_budget_alerts():
+    """Evaluate budget alerts for every user in one pass."""
+    from src.services.budget_alert import BudgetAlertService
+    alerts = BudgetAlertService.check_budget_status_many()
+    for user_id, user_alerts in alerts.items():
+        if user_alerts:
+            click.echo(f"user {user_id}: {len(user_alerts)} alerts")
+    click.echo(f"Checked budgets for {len(alerts)} users")
+
+
+@expenses_cli.command('rebuild-rollup')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user (default: everyone).')
+def rebuild_spend_rollup(user_id):
+    """Recompute the monthly spend rollup from raw expenses."""
+    from src.services.spend_rollup import SpendRollupService
+    rows = SpendRollupService.rebuild(user_id)
+    click.echo(f"Rebuilt {rows} monthly spend rows")
+
+
+@schema_cli.command('check-plans')
+@click.option('--user-id', type=int, default=1, show_default=True, help='User id to bind into the sample queries.')
+@click.option('--verbose', is_flag=True, help='Print every plan, not just failures.')
+def check_plans(user_id, verbose):
+    """Fail if any hot per-user query plans a full table scan."""
+    from src.services.query_plans import check_query_plans
+    failures = 0
+    for name, (plan, scans) in check_query_plans(user_id).items():
+        if scans:
+            failures += 1
+        if scans or verbose:
+            click.echo(f"{'FAIL' if scans else 'ok  '} {name}")
+            for line in plan:
+                click.echo(f"       {line}")
+    if failures:
+        raise click.ClickException(f"{failures} queries use table scans")
+    click.echo('All hot queries use indexes')
+
+
+def register_commands(app):
+    """Attach the FinIntel CLI command groups to the app."""
+    app.cli.add_command(market_cli)
+    app.cli.add_command(budget_cli)
+    app.cli.add_command(expenses_cli)
+    app.cli.add_command(schema_cli)
@@ -9,12 +9,29 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
-    stock_tickers = db.Column(db.String(500), default='')  # Comma-separated list of tickers
+    stock_tickers = db.Column(db.String(500), default='')  # Legacy comma-separated tickers, superseded by WatchlistItem
     expenses = db.relationship('Expense', backref='user', lazy=True)
     budgets = db.relationship('Budget', backref='user', lazy=True)
     goals = db.relationship('Goal', backref='user', lazy=True)
+    watchlist_items = db.relationship('WatchlistItem', backref='user', lazy=True, cascade='all, delete-orphan')
+
+class WatchlistItem(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'ticker', name='uq_watchlist_item_user_ticker'),
+        db.Index('ix_watchlist_item_ticker', 'ticker'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    ticker = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 class Expense(db.Model):
+    __table_args__ = (
+        db.Index('ix_expense_user_date', 'user_id', 'date', postgresql_include=['amount']),
+        db.Index('ix_expense_user_category_date', 'user_id', 'category', 'date', postgresql_include=['amount']),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(50), nullable=False)
@@ -23,7 +40,24 @@ class Expense(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
 
+class MonthlySpend(db.Model):
+    # Rollup of Expense per (user, category, month), kept in step by SpendRollupService
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'category', 'month', name='uq_monthly_spend_user_category_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class Budget(db.Model):
+    __table_args__ = (
+        db.Index('ix_budget_user_month', 'user_id', 'month'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     category = db.Column(db.String(50), nullable=False)
     amount = db.Column(db.Float, nullable=False)
@@ -31,9 +65,33 @@ class Budget(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
 class Goal(db.Model):
+    __table_args__ = (
+        db.Index('ix_goal_user_target_date', 'user_id', 'target_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     target_amount = db.Column(db.Float, nullable=False)
     current_amount = db.Column(db.Float, default=0.0)
     target_date = db.Column(db.Date, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+class ChatTurn(db.Model):
+    # Recent chat messages; older ones are folded into ChatSummary by ConversationStore
+    __table_args__ = (
+        db.Index('ix_chat_turn_user_id', 'user_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    role = db.Column(db.String(10), nullable=False)  # 'user' or 'assistant'
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ChatSummary(db.Model):
+    # Rolling summary of a user's chat turns that are no longer kept verbatim
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    turns_summarized = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -1,21 +1,49 @@
-from flask import Blueprint, request, jsonify, render_template, flash, redirect, url_for
+from flask import Blueprint, Response, request, jsonify, render_template, flash, redirect, url_for, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime
 from src.models import db, Expense, Budget, Goal
 from src.services.financial import FinancialService
-from src.services.market_data import MarketDataService, fetch_top_stocks, fetch_stock_info, plot_stocks
+from src.services.market_data import MarketDataService, TICKER_PATTERN, fetch_top_stocks, fetch_stock_info, fetch_stock_quotes
 from src.services.budget_alert import BudgetAlertService
+from src.services.spend_rollup import SpendRollupService
+from src.services.expense_import import ExpenseImportService, StatementImportError
+from src.services.data_export import DataExportService, EXPORT_COLUMNS, EXPORT_FORMATS
+from src.services.quote_cache import quote_cache
+from src.services.financial_context import financial_context_cache
+from src.services.advice_cache import advice_cache
+from src.services.prompt_builder import prompt_builder
+from src.services.llm_gateway import LLMError, llm_gateway
+from src.services.conversation import conversation_store
+from src.services.projections import MAX_PATH_POINTS, MAX_SCENARIOS, MAX_YEARS, sip_grid
+from src.services.portfolio_analytics import portfolio_analytics
+from src.services.market_providers import get_provider
+from src.services.price_store import PriceStore
+from src.services.chart_cache import chart_cache
+from src.services.chart_renderer import ChartRenderBusy, ChartRenderTimeout
+from sqlalchemy import and_, or_
+import base64
+import binascii
+import json
+import markdown
+import numpy as np
 
 # Initialize globals before blueprint creation
 financial_service = None
 market_service = None
+market_refresher = None
 
-def init_services(fin_service, mkt_service):
-    global financial_service, market_service
+def init_services(fin_service, mkt_service, mkt_refresher=None):
+    global financial_service, market_service, market_refresher
     financial_service = fin_service
     market_service = mkt_service
+    market_refresher = mkt_refresher
 finance_bp = Blueprint('finance', __name__)
 
+MAX_CHART_TICKERS = 25
+CHART_MAX_AGE = 3600
+EXPENSE_PAGE_SIZE = 50
+MAX_EXPENSE_PAGE_SIZE = 200
+
 @finance_bp.route('/sip-calculator', methods=['GET', 'POST'])
 @login_required
 def calculate_sip():
@@ -62,6 +90,55 @@ def calculate_sip():
         print(f"Error in SIP calculator: {str(e)}")
         return jsonify({'error': f'Failed to calculate SIP: {str(e)}'}), 500
 
+@finance_bp.route('/sip-calculator/batch', methods=['POST'])
+@login_required
+def calculate_sip_batch():
+    data = request.get_json(silent=True) or {}
+    path = data.get('path', 'none')
+    if path not in ('none', 'yearly', 'monthly'):
+        return jsonify({'error': "path must be 'none', 'yearly' or 'monthly'"}), 400
+
+    shape = None
+    try:
+        if 'grid' in data:
+            grid = data['grid']
+            (amounts, rates, terms, step_ups), shape = sip_grid(
+                grid['monthly_investment'], grid['expected_return'], grid['years'], grid.get('step_up', [0.0])
+            )
+        elif 'scenarios' in data:
+            scenarios = data['scenarios']
+            if not isinstance(scenarios, list):
+                raise TypeError('scenarios must be a list')
+            amounts = np.array([float(s['monthly_investment']) for s in scenarios])
+            rates = np.array([float(s['expected_return']) for s in scenarios])
+            terms = np.array([float(s['years']) for s in scenarios])
+            step_ups = np.array([float(s.get('step_up', 0)) for s in scenarios])
+        else:
+            return jsonify({'error': "Provide either 'grid' or 'scenarios'"}), 400
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid input format: {str(e)}'}), 400
+
+    if amounts.size == 0:
+        return jsonify({'error': 'No scenarios provided'}), 400
+    if amounts.size > MAX_SCENARIOS:
+        return jsonify({'error': f'At most {MAX_SCENARIOS} scenarios per request'}), 400
+    if not all(np.isfinite(values).all() for values in (amounts, rates, terms, step_ups)):
+        return jsonify({'error': 'All values must be finite numbers'}), 400
+    if (amounts <= 0).any() or (rates <= 0).any():
+        return jsonify({'error': 'Monthly investment and expected return must be greater than 0'}), 400
+    if (terms != np.floor(terms)).any() or (terms < 1).any() or (terms > MAX_YEARS).any():
+        return jsonify({'error': f'Investment period must be a whole number of years between 1 and {MAX_YEARS}'}), 400
+    if (step_ups < 0).any():
+        return jsonify({'error': 'Step-up must not be negative'}), 400
+    if path == 'monthly' and amounts.size * int(terms.max()) * 12 > MAX_PATH_POINTS:
+        return jsonify({'error': 'Too many scenarios for monthly paths, use yearly paths or fewer scenarios'}), 400
+
+    result = financial_service.calculate_sip_scenarios(amounts, rates, terms.astype(int), step_ups, path=path)
+    response = {'scenarios': result, 'count': len(result)}
+    if shape is not None:
+        response['shape'] = list(shape)
+    return jsonify(response)
+
 @finance_bp.route('/expenses', methods=['POST'])
 @login_required
 def add_expense():
@@ -74,7 +151,9 @@ def add_expense():
         user_id=current_user.id
     )
     db.session.add(expense)
+    SpendRollupService.record_added(expense)
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     return jsonify({'message': 'Expense added successfully', 'id': expense.id})
 
 @finance_bp.route('/expenses/<int:expense_id>', methods=['PUT'])
@@ -82,29 +161,103 @@ def add_expense():
 def update_expense(expense_id):
     expense = Expense.query.filter_by(id=expense_id, user_id=current_user.id).first_or_404()
     data = request.get_json()
+    old_category, old_date, old_amount = expense.category, expense.date, expense.amount
     
     expense.date = datetime.strptime(data['date'], '%Y-%m-%d')
     expense.amount = float(data['amount'])
     expense.category = data['category']
     expense.description = data.get('description', '')
     
+    SpendRollupService.record_changed(current_user.id, old_category, old_date, old_amount, expense)
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     return jsonify({'message': 'Expense updated successfully'})
 
 @finance_bp.route('/expenses/<int:expense_id>', methods=['DELETE'])
 @login_required
 def delete_expense(expense_id):
     expense = Expense.query.filter_by(id=expense_id, user_id=current_user.id).first_or_404()
+    SpendRollupService.record_removed(expense)
     db.session.delete(expense)
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     return jsonify({'message': 'Expense deleted successfully'})
 
+@finance_bp.route('/expenses/import', methods=['POST'])
+@login_required
+def import_expenses():
+    """Bulk-import expenses from an uploaded CSV or OFX bank statement."""
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No statement file uploaded'}), 400
+
+    try:
+        report = ExpenseImportService().import_statement(
+            current_user.id,
+            upload.stream,
+            filename=upload.filename,
+            file_format=request.form.get('format') or None,
+            default_category=request.form.get('category') or 'Others',
+            sign=request.form.get('sign') or 'auto'
+        )
+    except StatementImportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error importing expenses: {str(e)}")
+        return jsonify({'error': 'Failed to import statement'}), 500
+    if report['imported']:
+        financial_context_cache.invalidate(current_user.id)
+    return jsonify(report)
+
+@finance_bp.route('/export')
+@login_required
+def export_data():
+    """Stream the user's expenses, budgets and goals as CSV, NDJSON or Parquet."""
+    file_format = request.args.get('format', 'csv').lower()
+    record_types = {t.strip().lower() for t in request.args.get('types', '').split(',') if t.strip()}
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Format must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+    if not record_types <= set(EXPORT_COLUMNS):
+        return jsonify({'error': f'Types must be any of: {", ".join(EXPORT_COLUMNS)}'}), 400
+
+    try:
+        chunks = DataExportService().stream(current_user.id, file_format, record_types or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f"finintel-export-{datetime.now():%Y%m%d}.{file_format}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[file_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @finance_bp.route('/market-data')
 def get_market_data():
     """Get current market data."""
     data = market_service.get_market_indices()
     return jsonify(data)
 
+@finance_bp.route('/market-data/cache')
+def get_quote_cache_stats():
+    """Get hit/miss/stale counters for the shared quote cache."""
+    return jsonify(quote_cache.stats())
+
+@finance_bp.route('/market-data/store')
+def get_price_store_stats():
+    """Get read/upstream counters for the local price store."""
+    provider = get_provider()
+    if not isinstance(provider, PriceStore):
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **provider.stats()})
+
+@finance_bp.route('/market-data/status')
+def get_market_data_status():
+    """Get freshness of the background market data snapshot."""
+    if market_refresher is None:
+        return jsonify({'running': False, 'stale': True})
+    return jsonify(market_refresher.status())
+
 @finance_bp.route('/stocks')
 def top_stocks():
     """Display top stocks page."""
@@ -116,14 +269,76 @@ def top_stocks():
 def my_watchlist():
     """Display user's stock watchlist."""
     stocks_data = []
-    plot_url = ''
-    if current_user.stock_tickers:
-        tickers = current_user.stock_tickers.split(',')
-        for ticker in tickers:
-            stocks_data.append(fetch_stock_info(ticker))
-        if tickers:
-            plot_url = plot_stocks(tickers)
-    return render_template('watchlist.html', stocks=stocks_data, plot_url=plot_url)
+    chart_url = ''
+    tickers = market_service.get_watchlist()
+    if tickers:
+        stocks_data = fetch_stock_quotes(tickers)
+        chart_url = url_for('finance.watchlist_chart', tickers=','.join(sorted(tickers)))
+    return render_template('watchlist.html', stocks=stocks_data, chart_url=chart_url)
+
+@finance_bp.route('/charts/watchlist.png')
+@login_required
+def watchlist_chart():
+    """Serve the cached performance chart for a set of tickers."""
+    tickers = sorted({ticker.strip().upper() for ticker in request.args.get('tickers', '').split(',') if ticker.strip()})
+    if not tickers or len(tickers) > MAX_CHART_TICKERS or not all(TICKER_PATTERN.fullmatch(t) for t in tickers):
+        return jsonify({'error': 'Invalid ticker list'}), 400
+
+    key = chart_cache.key_for(tickers)
+    if key in request.if_none_match:
+        response = Response(status=304)
+    else:
+        try:
+            key, image = chart_cache.get_or_render(tickers)
+        except (ChartRenderBusy, ChartRenderTimeout) as e:
+            response = jsonify({'error': str(e)})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        except Exception as e:
+            print(f"Error rendering chart for {tickers}: {str(e)}")
+            return jsonify({'error': 'Chart unavailable'}), 404
+        response = Response(image, mimetype='image/png')
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.max_age = CHART_MAX_AGE
+    return response
+
+@finance_bp.route('/analytics')
+@login_required
+def portfolio_analytics_view():
+    """Returns, volatility, drawdowns, beta and correlations for the watchlist or given tickers."""
+    if request.args.get('tickers'):
+        tickers = sorted({ticker.strip().upper() for ticker in request.args['tickers'].split(',') if ticker.strip()})
+    else:
+        tickers = sorted(set(market_service.get_watchlist()))
+    if not tickers:
+        return jsonify({'error': 'Your watchlist is empty'}), 400
+    if len(tickers) > MAX_CHART_TICKERS or not all(TICKER_PATTERN.fullmatch(t) for t in tickers):
+        return jsonify({'error': 'Invalid ticker list'}), 400
+
+    window = request.args.get('window', '6mo')
+    with_series = request.args.get('series', '').lower() in ('1', 'true', 'yes')
+    try:
+        result = portfolio_analytics.get(tickers, window, with_series)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        print(f"Error computing analytics for {tickers}: {str(e)}")
+        return jsonify({'error': 'Analytics unavailable'}), 503
+
+    response = jsonify(result)
+    response.cache_control.private = True
+    response.cache_control.max_age = portfolio_analytics.ttl
+    return response
+
+@finance_bp.route('/analytics/cache')
+@login_required
+def portfolio_analytics_stats():
+    """Get hit/miss counters for the analytics cache."""
+    return jsonify(portfolio_analytics.stats())
 
 @finance_bp.route('/stock/<ticker>')
 def get_stock_details(ticker):
@@ -139,7 +354,11 @@ def add_to_watchlist():
         flash('Please provide a ticker symbol', 'error')
         return redirect(url_for('home'))
         
-    if market_service.add_stock_to_watchlist(ticker):
+    try:
+        added = market_service.add_stock_to_watchlist(ticker)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if added:
         flash(f'{ticker} added to watchlist', 'success')
     else:
         flash(f'{ticker} already in watchlist', 'info')
@@ -167,51 +386,119 @@ def get_budget_alerts():
 @finance_bp.route('/expenses')
 @login_required
 def expenses():
-    user_expenses = Expense.query.filter_by(user_id=current_user.id).order_by(Expense.date.desc()).all()
+    user_expenses, next_cursor = _expense_page(current_user.id, limit=EXPENSE_PAGE_SIZE)
     alerts = BudgetAlertService.check_budget_status(current_user.id)
-    return render_template('expenses.html', expenses=user_expenses, alerts=alerts)
+    return render_template('expenses.html', expenses=user_expenses, next_cursor=next_cursor, alerts=alerts)
 
-@finance_bp.route('/expenses/analysis')
+@finance_bp.route('/expenses/list')
 @login_required
-def analyze_expenses():
-    expenses = Expense.query.filter_by(user_id=current_user.id).order_by(Expense.date.asc()).all()
-    analysis = financial_service.analyze_expenses(expenses)
-    
-    # Add monthly trend data
-    monthly_data = {}
-    
-    # Get all expenses from the last 12 months
-    from datetime import datetime, timedelta
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=365)
-    
-    # Initialize all months with 0
-    current = start_date
-    while current <= end_date:
-        month_key = current.strftime('%Y-%m')
-        monthly_data[month_key] = 0
-        current = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+def list_expenses():
+    """Page through the user's expenses, newest first, with an opaque cursor."""
+    try:
+        limit = min(max(int(request.args.get('limit', EXPENSE_PAGE_SIZE)), 1), MAX_EXPENSE_PAGE_SIZE)
+        cursor = _decode_expense_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        start_date = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else None
+        end_date = datetime.strptime(request.args['end'], '%Y-%m-%d') if request.args.get('end') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
     
-    # Fill in actual expense data
-    for expense in expenses:
-        if start_date <= expense.date <= end_date:
-            month_key = expense.date.strftime('%Y-%m')
-            monthly_data[month_key] = monthly_data.get(month_key, 0) + expense.amount
+    user_expenses, next_cursor = _expense_page(
+        current_user.id,
+        cursor=cursor,
+        limit=limit,
+        category=request.args.get('category') or None,
+        start_date=start_date,
+        end_date=_end_of_day(end_date) if end_date else None
+    )
+    return jsonify({
+        'expenses': [
+            {
+                'id': expense.id,
+                'date': expense.date.strftime('%Y-%m-%d'),
+                'category': expense.category,
+                'amount': expense.amount,
+                'description': expense.description
+            }
+            for expense in user_expenses
+        ],
+        'next_cursor': next_cursor
+    })
+
+def _expense_page(user_id, cursor=None, limit=EXPENSE_PAGE_SIZE, category=None, start_date=None, end_date=None):
+    """Fetch one keyset page of expenses ordered by (date, id) descending."""
+    query = Expense.query.filter(Expense.user_id == user_id)
+    if category:
+        query = query.filter(Expense.category == category)
+    if start_date:
+        query = query.filter(Expense.date >= start_date)
+    if end_date:
+        query = query.filter(Expense.date <= end_date)
+    if cursor:
+        cursor_date, cursor_id = cursor
+        query = query.filter(or_(
+            Expense.date < cursor_date,
+            and_(Expense.date == cursor_date, Expense.id < cursor_id)
+        ))
     
-    analysis['monthly_trend'] = [
-        {
-            'month': datetime.strptime(month, '%Y-%m').strftime('%b %Y'),
-            'amount': amount
-        }
-        for month, amount in sorted(monthly_data.items())
-    ]
+    rows = query.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_expense_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def _sip_assumptions(data):
+    """Optional expected_return and step_up (% a year) for a goal's savings plan."""
+    expected_return = data.get('expected_return')
+    step_up = data.get('step_up') or 0
+    try:
+        expected_return = float(expected_return) if expected_return not in (None, '') else None
+        step_up = float(step_up)
+    except (TypeError, ValueError):
+        raise ValueError('expected_return and step_up must be numbers')
+    if expected_return is not None and not -100 < expected_return <= 100:
+        raise ValueError('expected_return must be between -100 and 100')
+    if not 0 <= step_up <= 100:
+        raise ValueError('step_up must be between 0 and 100')
+    return expected_return, step_up
+
+def _end_of_day(day):
+    """Inclusive upper bound for a date filter: the last microsecond of day."""
+    return day.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+def _encode_expense_cursor(expense):
+    raw = f"{expense.date.isoformat()}|{expense.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_expense_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        cursor_date, cursor_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(cursor_date), int(cursor_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('malformed cursor')
+
+@finance_bp.route('/expenses/analysis')
+@login_required
+def analyze_expenses():
+    try:
+        start_date = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else None
+        end_date = datetime.strptime(request.args['end'], '%Y-%m-%d') if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    if end_date is not None:
+        end_date = _end_of_day(end_date)
+    if start_date and end_date and start_date > end_date:
+        return jsonify({'error': 'Start date must be before end date'}), 400
     
+    analysis = financial_service.analyze_expense_history(current_user.id, start_date, end_date)
     return jsonify(analysis)
 
 @finance_bp.route('/goals', methods=['POST', 'PUT'])
 @login_required
 def create_goal():
     data = request.get_json()
+    try:
+        expected_return, step_up = _sip_assumptions(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     goal = Goal(
         name=data['name'],
         target_amount=float(data['target_amount']),
@@ -221,12 +508,15 @@ def create_goal():
     )
     db.session.add(goal)
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     
     # Calculate required savings
     savings_plan = financial_service.calculate_goal_savings(
         goal.target_amount,
         goal.target_date,
-        goal.current_amount
+        goal.current_amount,
+        expected_return=expected_return,
+        step_up=step_up
     )
     
     return jsonify({
@@ -239,6 +529,10 @@ def create_goal():
 def update_goal(goal_id):
     goal = Goal.query.filter_by(id=goal_id, user_id=current_user.id).first_or_404()
     data = request.get_json()
+    try:
+        expected_return, step_up = _sip_assumptions(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     goal.name = data['name']
     goal.target_amount = float(data['target_amount'])
@@ -246,11 +540,14 @@ def update_goal(goal_id):
     goal.target_date = datetime.strptime(data['target_date'], '%Y-%m-%d')
     
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     
     savings_plan = financial_service.calculate_goal_savings(
         goal.target_amount,
         goal.target_date,
-        goal.current_amount
+        goal.current_amount,
+        expected_return=expected_return,
+        step_up=step_up
     )
     
     return jsonify({
@@ -258,12 +555,48 @@ def update_goal(goal_id):
         'savings_plan': savings_plan
     })
 
+@finance_bp.route('/goals/<int:goal_id>/simulation')
+@login_required
+def simulate_goal(goal_id):
+    """Monte Carlo success probability and percentile bands for one goal."""
+    goal = Goal.query.filter_by(id=goal_id, user_id=current_user.id).first_or_404()
+    try:
+        contribution = request.args.get('monthly_contribution', type=float)
+        expected_return = request.args.get('expected_return', 10.0, type=float)
+        volatility = request.args.get('volatility', 15.0, type=float)
+        step_up = request.args.get('step_up', 0.0, type=float)
+        seed = request.args.get('seed', 0, type=int)
+        if seed < 0:
+            raise ValueError('seed must not be negative')
+        if contribution is not None and contribution < 0:
+            raise ValueError('Monthly contribution must not be negative')
+        if not -100 < expected_return <= 100 or not 0 <= volatility <= 100 or step_up < 0:
+            raise ValueError('expected_return, volatility and step_up are out of range')
+
+        result = financial_service.simulate_goal(
+            goal.target_amount,
+            goal.target_date,
+            goal.current_amount,
+            monthly_contribution=contribution,
+            expected_return=expected_return,
+            volatility=volatility,
+            step_up=step_up,
+            paths=request.args.get('paths', type=int),
+            seed=seed
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify({'goal_id': goal.id, 'target_amount': goal.target_amount, **result})
+
 @finance_bp.route('/goals/<int:goal_id>', methods=['DELETE'])
 @login_required
 def delete_goal(goal_id):
     goal = Goal.query.filter_by(id=goal_id, user_id=current_user.id).first_or_404()
     db.session.delete(goal)
     db.session.commit()
+    financial_context_cache.invalidate(current_user.id)
     return jsonify({'message': 'Goal deleted successfully'})
 
 @finance_bp.route('/goals')
@@ -284,9 +617,29 @@ def get_advice_info(info):
     try:
         advice_response = financial_service.get_financial_advice(topic,current_user.id)
         return jsonify(advice_response.get("html",""))
+    except LLMError as e:
+        return _llm_unavailable(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@finance_bp.route('/advice/cache')
+@login_required
+def get_advice_cache_stats():
+    """Get hit/miss counters and model calls for the advice cache."""
+    return jsonify(advice_cache.stats())
+
+@finance_bp.route('/advice/prompts')
+@login_required
+def get_prompt_stats():
+    """Get estimated prompt sizes sent to the model."""
+    return jsonify(prompt_builder.stats())
+
+@finance_bp.route('/advice/llm')
+@login_required
+def get_llm_stats():
+    """Get call counters and circuit breaker state for the model gateway."""
+    return jsonify(llm_gateway.stats())
+
 @finance_bp.route('/chat-page')
 @login_required
 def chat_page():
@@ -302,6 +655,69 @@ def chat():
     try:
         response = financial_service.Chat(message, current_user.id)
         return jsonify({'response': response.get("html","")})
+    except LLMError as e:
+        return _llm_unavailable(e)
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
         return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/chat/history')
+@login_required
+def chat_history():
+    """Get the stored conversation: rolling summary plus recent turns."""
+    summary, turns = conversation_store.history(current_user.id)
+    return jsonify({
+        'summary': summary,
+        'turns': [
+            {'role': role, 'html': markdown.markdown(content) if role == 'assistant' else None, 'text': content}
+            for role, content in turns
+        ]
+    })
+
+@finance_bp.route('/chat/history', methods=['DELETE'])
+@login_required
+def clear_chat_history():
+    """Start a new conversation."""
+    conversation_store.clear(current_user.id)
+    return jsonify({'message': 'Conversation cleared'})
+
+@finance_bp.route('/chat/stream')
+@login_required
+def chat_stream():
+    """Stream a chat reply as Server-Sent Events while the model generates it."""
+    message = request.args.get('message', '')
+    if not message:
+        return jsonify({'error': 'No message provided'}), 400
+    user_id = current_user.id
+
+    def events():
+        text = ''
+        try:
+            for delta in financial_service.stream_chat(message, user_id):
+                text += delta
+                yield _sse_event({'delta': delta})
+            yield _sse_event({'html': markdown.markdown(text)}, event='done')
+        except Exception as e:
+            print(f"Error in chat stream: {e}")
+            yield _sse_event({'error': str(e)}, event='chat-error')
+            return
+        financial_service.remember_chat(user_id, message, text)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _llm_unavailable(error):
+    """503 with Retry-After for a busy, slow or tripped model gateway."""
+    response = jsonify({'error': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+def _sse_event(data, event=None):
+    """Format one Server-Sent Event carrying a JSON payload."""
+    lines = [f'event: {event}'] if event else []
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from src.services.quote_cache import QuoteCache
+
+
+def advice_key(user_id, topic, context_hash):
+    """Cache key for one user's advice on a topic given their current data."""
+    raw = '|'.join([str(user_id), topic.strip().lower(), context_hash])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class AdviceCache:
+    """TTL + LRU cache of generated advice, optionally persisted to SQLite.
+
+    Keys include a hash of the user's financial context, so a data change
+    produces a new key and old answers simply age out. With db_path set,
+    answers survive restarts and are shared between worker processes.
+    """
+
+    def __init__(self, ttl=6 * 3600, max_size=1024, db_path=None):
+        self._memory = QuoteCache(ttl=ttl, max_size=max_size)
+        self.db_path = None
+        self._lock = threading.Lock()
+        self._generated = 0
+        self._disk_hits = 0
+        if db_path:
+            self.configure(db_path=db_path)
+
+    @property
+    def ttl(self):
+        return self._memory.ttl
+
+    @property
+    def max_size(self):
+        return self._memory.max_size
+
+    def configure(self, ttl=None, max_size=None, db_path=None):
+        """Update TTL (seconds), maximum entries and the optional SQLite file."""
+        self._memory.configure(ttl=ttl, max_size=max_size)
+        self.db_path = db_path
+        if db_path:
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS advice_cache '
+                    '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS ix_advice_cache_expires_at ON advice_cache (expires_at)')
+
+    def key_for(self, user_id, topic, context_hash):
+        return advice_key(user_id, topic, context_hash)
+
+    def get(self, key, loader):
+        """Return cached advice for key, calling loader() only on a miss everywhere."""
+        return self._memory.get(key, lambda key: self._load(key, loader))
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None, from memory and disk."""
+        self._memory.invalidate(key)
+        if self.db_path:
+            with self._connect() as connection:
+                if key is None:
+                    connection.execute('DELETE FROM advice_cache')
+                else:
+                    connection.execute('DELETE FROM advice_cache WHERE key = ?', (key,))
+
+    def stats(self):
+        """Return memory counters plus model calls and disk hits."""
+        stats = self._memory.stats()
+        with self._lock:
+            stats.update({'generated': self._generated, 'disk_hits': self._disk_hits, 'persistent': bool(self.db_path)})
+        return stats
+
+    def _load(self, key, loader):
+        value = self._read(key)
+        if value is not None:
+            with self._lock:
+                self._disk_hits += 1
+            return value
+
+        value = loader()
+        with self._lock:
+            self._generated += 1
+        self._write(key, value)
+        return value
+
+    def _read(self, key):
+        if not self.db_path:
+            return None
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    'SELECT value FROM advice_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading advice cache: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _write(self, key, value):
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO advice_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), time.time() + self.ttl)
+                )
+                connection.execute('DELETE FROM advice_cache WHERE expires_at <= ?', (time.time(),))
+                connection.execute(
+                    'DELETE FROM advice_cache WHERE key NOT IN '
+                    '(SELECT key FROM advice_cache ORDER BY expires_at DESC LIMIT ?)', (self.max_size,)
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing advice cache: {str(e)}")
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+advice_cache = AdviceCache()
@@ -1,56 +1,84 @@
-from datetime import datetime
-from src.models import Budget, Expense
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func
+from src.models import db, Budget, Expense, MonthlySpend
 
 class BudgetAlertService:
     @staticmethod
     def check_budget_status(user_id):
         """Check budget status and generate alerts."""
+        return BudgetAlertService.check_budget_status_many([user_id]).get(user_id, [])
+
+    @staticmethod
+    def check_budget_status_many(user_ids=None):
+        """Check budget status for many users (default: all) in one query.
+
+        Returns {user_id: alerts} for every user that has a budget.
+        """
         current_date = datetime.now()
+        current_month = date(current_date.year, current_date.month, 1)
+        next_month = datetime.combine((current_month + timedelta(days=32)).replace(day=1), datetime.min.time())
+
+        # The rollup holds the whole month; expenses dated later this month
+        # (e.g. rent entered early) are summed raw and taken off again
+        upcoming = db.session.query(
+            Expense.user_id, Expense.category, func.sum(Expense.amount).label('total')
+        ).filter(Expense.date > current_date, Expense.date < next_month)
+        if user_ids is not None:
+            upcoming = upcoming.filter(Expense.user_id.in_(user_ids))
+        upcoming = upcoming.group_by(Expense.user_id, Expense.category).subquery()
+
+        spent = func.coalesce(MonthlySpend.total, 0.0) - func.coalesce(upcoming.c.total, 0.0)
+        query = db.session.query(Budget.user_id, Budget.category, Budget.amount, spent)\
+            .outerjoin(MonthlySpend, and_(
+                MonthlySpend.user_id == Budget.user_id,
+                MonthlySpend.category == Budget.category,
+                MonthlySpend.month == current_month
+            ))\
+            .outerjoin(upcoming, and_(
+                upcoming.c.user_id == Budget.user_id,
+                upcoming.c.category == Budget.category
+            ))\
+            .order_by(Budget.user_id, Budget.id)
+        if user_ids is not None:
+            query = query.filter(Budget.user_id.in_(user_ids))
+
+        alerts = {}
+        for user_id, category, budget_limit, total_spent in query.all():
+            alerts.setdefault(user_id, []).extend(
+                BudgetAlertService.build_alerts(category, budget_limit, total_spent, current_date)
+            )
+        return alerts
+
+    @staticmethod
+    def build_alerts(category, budget_limit, total_spent, current_date):
+        """Generate alerts for one budget given its month-to-date spend."""
         alerts = []
-        
-        # Get all active budgets for the user
-        budgets = Budget.query.filter_by(user_id=user_id).all()
-        
-        for budget in budgets:
-            # Get expenses for the current month in this category
-            expenses = Expense.query.filter_by(
-                user_id=user_id,
-                category=budget.category
-            ).filter(
-                Expense.date.between(
-                    datetime(current_date.year, current_date.month, 1),
-                    current_date
-                )
-            ).all()
-            
-            total_spent = sum(expense.amount for expense in expenses)
-            budget_limit = budget.amount
-            spent_percentage = (total_spent / budget_limit) * 100 if budget_limit > 0 else 0
-            
-            # Generate alerts based on spending thresholds
-            if spent_percentage >= 90:
-                alerts.append({
-                    'category': budget.category,
-                    'severity': 'danger',
-                    'message': f'Critical: You have spent {spent_percentage:.1f}% of your {budget.category} budget'
-                })
-            elif spent_percentage >= 75:
-                alerts.append({
-                    'category': budget.category,
-                    'severity': 'warning',
-                    'message': f'Warning: You have spent {spent_percentage:.1f}% of your {budget.category} budget'
-                })
-            
-            # Daily average spending alert
-            days_in_month = current_date.day
-            daily_average = total_spent / days_in_month if days_in_month > 0 else 0
-            budget_daily_limit = budget_limit / 30
-            
-            if daily_average > budget_daily_limit * 1.2:  # 20% over daily average
-                alerts.append({
-                    'category': budget.category,
-                    'severity': 'info',
-                    'message': f'Your daily spending in {budget.category} is higher than recommended'
-                })
-        
+        spent_percentage = (total_spent / budget_limit) * 100 if budget_limit > 0 else 0
+
+        # Generate alerts based on spending thresholds
+        if spent_percentage >= 90:
+            alerts.append({
+                'category': category,
+                'severity': 'danger',
+                'message': f'Critical: You have spent {spent_percentage:.1f}% of your {category} budget'
+            })
+        elif spent_percentage >= 75:
+            alerts.append({
+                'category': category,
+                'severity': 'warning',
+                'message': f'Warning: You have spent {spent_percentage:.1f}% of your {category} budget'
+            })
+
+        # Daily average spending alert
+        days_in_month = current_date.day
+        daily_average = total_spent / days_in_month if days_in_month > 0 else 0
+        budget_daily_limit = budget_limit / 30
+
+        if daily_average > budget_daily_limit * 1.2:  # 20% over daily average
+            alerts.append({
+                'category': category,
+                'severity': 'info',
+                'message': f'Your daily spending in {category} is higher than recommended'
+            })
+
         return alerts
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from src.services.market_data import render_stocks_chart
+from src.services.market_refresher import MARKET_TIMEZONE
+
+
+def chart_key(tickers, period, interval, data_date):
+    """Cache key / ETag for a chart of a ticker set on a given trading day."""
+    raw = '|'.join([','.join(sorted(set(tickers))), period, interval, data_date])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ChartCache:
+    """Size-bounded cache of rendered chart PNGs, in memory and optionally on disk.
+
+    Charts are keyed by (sorted ticker set, period, interval, market date),
+    so every user with the same watchlist shares one render per trading day.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, cache_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._images = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        self.renders = 0
+
+    def configure(self, max_bytes=None, cache_dir=None, max_disk_bytes=None):
+        """Update memory/disk limits and the optional on-disk directory."""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_disk_bytes is not None:
+                self.max_disk_bytes = max_disk_bytes
+            self.cache_dir = cache_dir
+            self._evict()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, tickers, period='1mo', interval='1d'):
+        """Key of the chart for tickers as of today's market date."""
+        data_date = datetime.now(MARKET_TIMEZONE).strftime('%Y-%m-%d')
+        return chart_key(tickers, period, interval, data_date)
+
+    def get_or_render(self, tickers, period='1mo', interval='1d'):
+        """Return (key, png bytes), rendering at most once per key across threads."""
+        tickers = sorted(set(tickers))
+        key = self.key_for(tickers, period, interval)
+        image = self.get(key)
+        if image is not None:
+            return key, image
+
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        try:
+            with render_lock:
+                image = self.get(key)
+                if image is None:
+                    image = render_stocks_chart(tickers, period, interval)
+                    self.renders += 1
+                    self.put(key, image)
+        finally:
+            # a failed render must not leave its lock behind
+            with self._lock:
+                self._render_locks.pop(key, None)
+        return key, image
+
+    def get(self, key):
+        """Get a cached PNG from memory, then disk, or None."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                image = f.read()
+            self._remember(key, image)
+            return image
+        return None
+
+    def put(self, key, image):
+        """Store a PNG in memory and, if configured, on disk."""
+        self._remember(key, image)
+        path = self._path(key)
+        if path:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+
+    def _remember(self, key, image):
+        with self._lock:
+            if key in self._images:
+                self._size -= len(self._images.pop(key))
+            self._images[key] = image
+            self._size += len(image)
+            self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png") if self.cache_dir else None
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._images:
+            _, image = self._images.popitem(last=False)
+            self._size -= len(image)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.png'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        """Return occupancy and render count."""
+        with self._lock:
+            return {
+                'images': len(self._images),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'renders': self.renders,
+                'cache_dir': self.cache_dir
+            }
+
+
+chart_cache = ChartCache()
@@ -0,0 +1,114 @@
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ChartRenderBusy(Exception):
+    """Raised when the render queue is full and the caller should back off."""
+
+
+class ChartRenderTimeout(Exception):
+    """Raised when a render does not finish within the configured timeout."""
+
+
+def render_weekly_performance(perf_wk):
+    """Render a weekly percent-change frame to PNG bytes.
+
+    Runs inside worker processes, so it uses a private Figure with the Agg
+    canvas instead of the global pyplot state machine.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(perf_wk)
+    ax.set_title('SYMBOLS', fontsize=14)
+    ax.set_ylabel('percent change', fontsize=14)
+    ax.legend(perf_wk.columns, loc="upper left", bbox_to_anchor=(1, 1))
+    ax.tick_params(axis='x', labelrotation=90)
+    fig.tight_layout()
+
+    img = io.BytesIO()
+    fig.savefig(img, format='png')
+    return img.getvalue()
+
+
+class ChartRenderPool:
+    """Bounded process pool for CPU-bound chart rendering.
+
+    At most workers + max_queue renders are in flight; beyond that submit()
+    raises ChartRenderBusy instead of queueing without limit.
+    """
+
+    def __init__(self, workers=2, max_queue=8, timeout=20):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+
+    def configure(self, workers=None, max_queue=None, timeout=None):
+        """Resize the pool; takes effect for the next executor started."""
+        with self._lock:
+            if workers is not None:
+                self.workers = workers
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if timeout is not None:
+                self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+            self._shutdown_executor()
+
+    def render(self, fn, *args):
+        """Run fn(*args) in a worker process and return its result."""
+        if not self._slots.acquire(blocking=False):
+            raise ChartRenderBusy('Chart renderer is busy, try again shortly')
+        slots = self._slots
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self.shutdown()
+            raise
+        except Exception:
+            slots.release()
+            raise
+        # free the slot when the worker finishes, not when the caller gives up
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ChartRenderTimeout(f"Chart render exceeded {self.timeout}s")
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool for the next render
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            self._shutdown_executor()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent has live threads (refresher, request workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+chart_render_pool = ChartRenderPool()
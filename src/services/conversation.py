@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from src.models import db, ChatTurn, ChatSummary
+from src.services.llm_gateway import llm_gateway
+
+
+class ConversationStore:
+    """Per-user chat memory: recent turns verbatim plus a rolling summary.
+
+    Once more than keep_turns + summarize_batch turns are stored, everything
+    but the newest keep_turns is folded into the user's ChatSummary with one
+    model call and deleted, so stored turns and the summary stay bounded.
+    That model call runs on a background thread, never in the request.
+    """
+
+    def __init__(self, llm=None, keep_turns=6, summarize_batch=6, max_summary_chars=2000):
+        self.llm = llm or llm_gateway
+        self.keep_turns = keep_turns
+        self.summarize_batch = summarize_batch
+        self.max_summary_chars = max_summary_chars
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def configure(self, keep_turns=None, summarize_batch=None, max_summary_chars=None):
+        """Update how many turns are kept verbatim and the summary size cap."""
+        if keep_turns is not None:
+            self.keep_turns = keep_turns
+        if summarize_batch is not None:
+            self.summarize_batch = summarize_batch
+        if max_summary_chars is not None:
+            self.max_summary_chars = max_summary_chars
+
+    def history(self, user_id):
+        """Get (summary, [(role, content), ...]) with turns oldest first."""
+        summary = db.session.query(ChatSummary.summary).filter_by(user_id=user_id).scalar() or ''
+        turns = db.session.query(ChatTurn.role, ChatTurn.content)\
+            .filter(ChatTurn.user_id == user_id)\
+            .order_by(ChatTurn.id.desc())\
+            .limit(self.keep_turns + self.summarize_batch)\
+            .all()
+        return summary, [(role, content) for role, content in reversed(turns)]
+
+    def record_exchange(self, user_id, question, answer):
+        """Store one question/answer pair and schedule compaction if needed."""
+        db.session.add(ChatTurn(user_id=user_id, role='user', content=question))
+        db.session.add(ChatTurn(user_id=user_id, role='assistant', content=answer))
+        db.session.commit()
+        count = db.session.query(func.count(ChatTurn.id)).filter(ChatTurn.user_id == user_id).scalar()
+        if count > self.keep_turns + self.summarize_batch:
+            self.schedule_compaction(user_id)
+
+    def schedule_compaction(self, user_id):
+        """Run compact(user_id) on the background thread; at most one pending run per user."""
+        app = current_app._get_current_object()
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-compaction')
+            executor = self._executor
+
+        def run():
+            try:
+                with app.app_context():
+                    self.compact(user_id)
+            except Exception as e:
+                print(f"Error compacting chat history for user {user_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.discard(user_id)
+
+        executor.submit(run)
+
+    def compact(self, user_id):
+        """Fold all but the newest keep_turns turns into the rolling summary."""
+        count = db.session.query(func.count(ChatTurn.id)).filter(ChatTurn.user_id == user_id).scalar()
+        if count <= self.keep_turns + self.summarize_batch:
+            return False
+
+        old_turns = ChatTurn.query.filter_by(user_id=user_id)\
+            .order_by(ChatTurn.id)\
+            .limit(count - self.keep_turns)\
+            .all()
+        summary = ChatSummary.query.filter_by(user_id=user_id).first()
+        if summary is None:
+            summary = ChatSummary(user_id=user_id, summary='', turns_summarized=0)
+            db.session.add(summary)
+
+        try:
+            text = self.llm.generate(self._summary_prompt(summary.summary, old_turns))
+        except Exception as e:
+            print(f"Error summarizing chat history for user {user_id}: {str(e)}")
+            db.session.rollback()
+            # keep storage bounded even while the model is unavailable
+            if count > 3 * (self.keep_turns + self.summarize_batch):
+                ChatTurn.query.filter(ChatTurn.id.in_([turn.id for turn in old_turns]))\
+                    .delete(synchronize_session=False)
+                db.session.commit()
+            return False
+
+        summary.summary = text.strip()[:self.max_summary_chars]
+        summary.turns_summarized += len(old_turns)
+        summary.updated_at = datetime.utcnow()
+        ChatTurn.query.filter(ChatTurn.id.in_([turn.id for turn in old_turns]))\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return True
+
+    def clear(self, user_id):
+        """Forget a user's conversation."""
+        ChatTurn.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        ChatSummary.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _summary_prompt(self, previous_summary, turns):
+        transcript = '\n'.join(
+            f"{'User' if turn.role == 'user' else 'Assistant'}: {turn.content}" for turn in turns
+        )
+        words = self.max_summary_chars // 6
+        return (
+            "Update the running summary of a conversation between a user and their financial assistant. "
+            "Keep the user's questions, stated goals, preferences, figures and the advice already given. "
+            f"Write plain text, at most {words} words.\n\n"
+            f"Current summary: {previous_summary or 'None'}\n\n"
+            f"New messages:\n{transcript}"
+        )
+
+
+conversation_store = ConversationStore()
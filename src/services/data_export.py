@@ -0,0 +1,130 @@
+import csv
+import importlib.util
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from src.models import db, Expense, Budget, Goal
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+EXPORT_COLUMNS = {
+    'expense': [Expense.id, Expense.date, Expense.category, Expense.amount, Expense.description],
+    'budget': [Budget.id, Budget.month, Budget.category, Budget.amount],
+    'goal': [Goal.id, Goal.name, Goal.target_amount, Goal.current_amount, Goal.target_date]
+}
+# One flat layout for every record type; fields a type doesn't have are left empty
+EXPORT_FIELDS = [
+    'type', 'id', 'date', 'month', 'target_date', 'category', 'name',
+    'amount', 'target_amount', 'current_amount', 'description'
+]
+
+
+class DataExportService:
+    """Streams a user's expenses, budgets and goals as CSV, NDJSON or Parquet.
+
+    Rows are read with yield_per so the driver uses a server-side cursor
+    where it has one, and each format writer yields one encoded chunk per
+    batch; memory stays bounded by chunk_size regardless of history length.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+
+    def iter_chunks(self, user_id, record_types=None):
+        """Yield lists of at most chunk_size record dicts, one type at a time."""
+        for record_type, columns in EXPORT_COLUMNS.items():
+            if record_types and record_type not in record_types:
+                continue
+            model = columns[0].class_
+            statement = select(*columns)\
+                .where(model.user_id == user_id)\
+                .order_by(columns[0])\
+                .execution_options(yield_per=self.chunk_size)
+            result = db.session.execute(statement)
+            for partition in result.partitions():
+                yield [dict(row._mapping, type=record_type) for row in partition]
+
+    def stream(self, user_id, file_format='csv', record_types=None):
+        """Return a generator of encoded chunks for the requested format."""
+        writers = {'csv': self._csv, 'ndjson': self._ndjson, 'parquet': self._parquet}
+        if file_format not in writers:
+            raise ValueError(f"Unsupported export format: {file_format}")
+        if file_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+            raise ValueError('Parquet export requires pyarrow to be installed')
+        return writers[file_format](self.iter_chunks(user_id, record_types))
+
+    def _csv(self, chunks):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for chunk in chunks:
+            writer.writerows({key: _text(value) for key, value in record.items()} for record in chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def _ndjson(self, chunks):
+        for chunk in chunks:
+            yield ''.join(json.dumps(record, default=_text) + '\n' for record in chunk)
+
+    def _parquet(self, chunks):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ('type', pa.string()),
+            ('id', pa.int64()),
+            ('date', pa.timestamp('us')),
+            ('month', pa.date32()),
+            ('target_date', pa.date32()),
+            ('category', pa.string()),
+            ('name', pa.string()),
+            ('amount', pa.float64()),
+            ('target_amount', pa.float64()),
+            ('current_amount', pa.float64()),
+            ('description', pa.string())
+        ])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -0,0 +1,275 @@
+import csv
+import io
+import re
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, insert
+from src.models import db, Expense
+from src.services.data_export import EXPORT_FIELDS
+from src.services.spend_rollup import SpendRollupService
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%d %b %Y', '%Y%m%d']
+DATE_COLUMNS = ['date', 'transaction date', 'txn date', 'value date', 'posted date']
+AMOUNT_COLUMNS = ['amount', 'debit', 'withdrawal', 'withdrawal amount', 'debit amount']
+CATEGORY_COLUMNS = ['category']
+DESCRIPTION_COLUMNS = ['description', 'narration', 'details', 'memo', 'payee', 'name']
+OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+CREDIT_MARKER = re.compile(r'\b(CR|DR)\.?$', re.IGNORECASE)
+MAX_REPORTED_ERRORS = 100
+# which sign a signed amount column gives expenses; 'auto' decides from the file
+SIGN_CONVENTIONS = ('auto', 'negative_is_expense', 'positive_is_expense')
+
+
+class StatementImportError(ValueError):
+    """Raised when an uploaded statement cannot be read at all."""
+
+
+class ExpenseImportService:
+    """Streams CSV/OFX bank statements into Expense rows in batched inserts.
+
+    Rows are parsed one at a time, deduplicated against the user's existing
+    expenses per batch, and inserted with executemany. The whole import is
+    one transaction and the monthly rollup is updated once at the end.
+
+    In a signed amount column the sign convention picks which rows are
+    expenses: with 'auto', negatives are expenses if the file has any,
+    otherwise every amount is (as in our own export and many budgeting
+    apps). DR/CR markers always win. Credits are skipped like OFX credits
+    and blank debit-column rows.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+
+    def import_statement(self, user_id, stream, filename='', file_format=None, default_category='Others', sign='auto'):
+        """Import a CSV or OFX statement; returns a per-row report."""
+        file_format = (file_format or filename.rsplit('.', 1)[-1]).lower()
+        if sign not in SIGN_CONVENTIONS:
+            raise StatementImportError(f"Sign must be one of: {', '.join(SIGN_CONVENTIONS)}")
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+        if file_format in ('ofx', 'qfx'):
+            rows = self._parse_ofx(text, default_category)
+        elif file_format == 'csv':
+            if sign == 'auto':
+                sign = self._detect_sign(text)
+            rows = self._parse_csv(text, default_category, sign)
+        else:
+            raise StatementImportError(f"Unsupported statement format: {file_format}")
+
+        report = {'imported': 0, 'duplicates': 0, 'skipped': 0, 'error_count': 0, 'errors': []}
+        rollup = {}
+        batch = []
+        try:
+            # dedupe against what was stored before this import, never against its own rows
+            last_existing_id = db.session.query(func.max(Expense.id)).filter(Expense.user_id == user_id).scalar() or 0
+            matched = Counter()
+            for line_number, row in rows:
+                try:
+                    expense = self._validate(row, user_id) if row is not None else None
+                except ValueError as e:
+                    report['error_count'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append({'row': line_number, 'error': str(e)})
+                    continue
+                if expense is None:
+                    report['skipped'] += 1
+                    continue
+                batch.append(expense)
+                if len(batch) >= self.batch_size:
+                    self._flush(user_id, batch, report, rollup, last_existing_id, matched)
+                    batch = []
+            self._flush(user_id, batch, report, rollup, last_existing_id, matched)
+
+            for (category, month), (amount, count) in rollup.items():
+                SpendRollupService.apply(user_id, category, month, amount, count)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            text.detach()
+        return report
+
+    def _flush(self, user_id, batch, report, rollup, last_existing_id, matched):
+        if not batch:
+            return
+        # Each stored expense absorbs at most one statement row (matched carries
+        # that across batches), so identical purchases in one statement are all
+        # kept unless as many are already stored; this import's rows are excluded by id
+        start = min(row['date'] for row in batch)
+        end = max(row['date'] for row in batch)
+        existing = Counter(
+            (date, round(amount, 2), description or '')
+            for date, amount, description in db.session.query(
+                Expense.date, Expense.amount, Expense.description
+            ).filter(
+                Expense.user_id == user_id,
+                Expense.date.between(start, end),
+                Expense.id <= last_existing_id
+            )
+        )
+
+        rows = []
+        for row in batch:
+            key = (row['date'], round(row['amount'], 2), row['description'])
+            if existing[key] > matched[key]:
+                matched[key] += 1
+                report['duplicates'] += 1
+                continue
+            rows.append(row)
+            bucket = (row['category'], row['date'].date().replace(day=1))
+            amount, count = rollup.get(bucket, (0.0, 0))
+            rollup[bucket] = (amount + row['amount'], count + 1)
+
+        if rows:
+            db.session.execute(insert(Expense), rows)
+            report['imported'] += len(rows)
+
+    def _validate(self, row, user_id):
+        raw_date = (row.get('date') or '').strip()
+        if not raw_date:
+            raise ValueError('missing date')
+        date = _parse_date(raw_date)
+
+        raw_amount = (row.get('amount') or '').strip()
+        if not raw_amount:
+            raise ValueError('missing amount')
+        amount = _parse_amount(raw_amount)
+        if amount == 0:
+            raise ValueError('amount must be non-zero')
+        expense_sign = row.get('expense_sign')
+        if expense_sign and CREDIT_MARKER.search(raw_amount):
+            expense_sign = -1  # DR/CR already made debits negative
+        if expense_sign and amount * expense_sign < 0:
+            return None  # a credit, deposit or refund
+        amount = abs(amount)
+
+        category = (row.get('category') or '').strip()
+        if not category:
+            raise ValueError('missing category')
+        return {
+            'user_id': user_id,
+            'date': date,
+            'amount': round(amount, 2),
+            'category': category[:50],
+            'description': (row.get('description') or '').strip()[:200]
+        }
+
+    def _detect_sign(self, text):
+        """'negative_is_expense' if any amount in the file is negative, else 'positive_is_expense'."""
+        if not text.seekable():
+            return 'negative_is_expense'
+        sign = 'positive_is_expense'
+        reader = csv.reader(text)
+        columns = [column.strip().lower() for column in next(reader, None) or []]
+        amount_index = _find_column(columns, AMOUNT_COLUMNS)
+        if amount_index is not None and columns[amount_index] == 'amount':
+            for values in reader:
+                try:
+                    if amount_index < len(values) and _parse_amount(values[amount_index]) < 0:
+                        sign = 'negative_is_expense'
+                        break
+                except ValueError:
+                    continue
+        text.seek(0)
+        return sign
+
+    def _parse_csv(self, text, default_category, sign='negative_is_expense'):
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if not header:
+            raise StatementImportError('CSV file is empty')
+        columns = [column.strip().lower() for column in header]
+        date_index = _find_column(columns, DATE_COLUMNS)
+        amount_index = _find_column(columns, AMOUNT_COLUMNS)
+        if date_index is None or amount_index is None:
+            raise StatementImportError('CSV must have a date column and an amount/debit column')
+        category_index = _find_column(columns, CATEGORY_COLUMNS)
+        description_index = _find_column(columns, DESCRIPTION_COLUMNS)
+        # a separate debit column means blank debits are credits, not expenses
+        debit_only = columns[amount_index] != 'amount'
+        expense_sign = None if debit_only else (-1 if sign == 'negative_is_expense' else 1)
+        # our own export also carries budgets and goals; only expenses come back in
+        type_index = columns.index('type') if columns == EXPORT_FIELDS else None
+
+        for line_number, values in enumerate(reader, start=2):
+            if not any(value.strip() for value in values):
+                continue
+            get = lambda index: values[index] if index is not None and index < len(values) else ''
+            if (debit_only and not get(amount_index).strip()) or get(type_index) not in ('', 'expense'):
+                yield line_number, None
+                continue
+            yield line_number, {
+                'date': get(date_index),
+                'amount': get(amount_index),
+                'expense_sign': expense_sign,
+                'category': get(category_index) or default_category,
+                'description': get(description_index)
+            }
+
+    def _parse_ofx(self, text, default_category):
+        transaction = None
+        start_line = 0
+        for line_number, line in enumerate(text, start=1):
+            for tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    transaction = {}
+                    start_line = line_number
+                elif transaction is not None:
+                    transaction[tag] = value.strip()
+            if transaction is not None and '</STMTTRN>' in line.upper():
+                yield start_line, self._ofx_row(transaction, default_category)
+                transaction = None
+
+    def _ofx_row(self, transaction, default_category):
+        amount = transaction.get('TRNAMT', '')
+        if amount and not amount.startswith('-'):
+            return None  # credits are income, not expenses
+        return {
+            'date': transaction.get('DTPOSTED', '')[:8],
+            'amount': amount,
+            'category': default_category,
+            'description': transaction.get('NAME') or transaction.get('MEMO', '')
+        }
+
+
+def _find_column(columns, candidates):
+    for candidate in candidates:
+        if candidate in columns:
+            return columns.index(candidate)
+    return None
+
+
+def _parse_amount(value):
+    """Signed amount from bank formats: -1,234.50, (1,234.50), 1,234.50 DR / CR, ₹1234."""
+    text = value.strip()
+    sign = 1
+    marker = CREDIT_MARKER.search(text)
+    if marker:
+        sign = -1 if marker.group(1).upper() == 'DR' else 1
+        text = text[:marker.start()].strip()
+    if text.startswith('(') and text.endswith(')'):
+        sign = -sign
+        text = text[1:-1]
+    number = re.sub(r'[^\d.\-]', '', text)
+    try:
+        amount = float(number)
+    except ValueError:
+        raise ValueError(f"invalid amount: {value}")
+    if marker:
+        amount = abs(amount)
+    return sign * amount
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    try:
+        # ISO timestamps, as written by the export
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"unrecognised date: {value}")
@@ -1,178 +1,180 @@
-import google.generativeai as genai
 from datetime import datetime
+import math
 import markdown
-from functools import lru_cache
-from src.models import Expense, Budget, Goal
-from flask import current_app
+from src.models import db
+from src.services.spend_rollup import SpendRollupService
+from src.services.financial_context import financial_context_cache
+from src.services.advice_cache import advice_cache
+from src.services.prompt_builder import prompt_builder
+from src.services.llm_gateway import llm_gateway
+from src.services.conversation import conversation_store
+from src.services.projections import project_sip, required_monthly_investment
+from src.services.goal_simulation import goal_simulator
+import numpy as np
 from datetime import datetime, timedelta
 
 class FinancialService:
 
-    def call(self,user_id):
-        
-        # Get user's financial data from the last 6 months
-        six_months_ago = datetime.now() - timedelta(days=180)
-        
-        with current_app.app_context():
-            # Get expenses
-            expenses = Expense.query.filter_by(user_id=user_id)\
-                .filter(Expense.date >= six_months_ago)\
-                .order_by(Expense.date.desc()).all()
-            
-            # Get budgets
-            budgets = Budget.query.filter_by(user_id=user_id)\
-                .filter(Budget.month >= six_months_ago)\
-                .all()
-            
-            # Get goals
-            goals = Goal.query.filter_by(user_id=user_id).all()
-            
-            # Format data for the AI
-            self.expense_data = [
-                {
-                    'amount': expense.amount,
-                    'category': expense.category,
-                    'date': expense.date.strftime('%Y-%m-%d'),
-                    'description': expense.description
-                }
-                for expense in expenses
-            ]
-            
-            self.budget_data = [
-                {
-                    'category': budget.category,
-                    'amount': budget.amount,
-                    'month': budget.month.strftime('%Y-%m')
-                }
-                for budget in budgets
-            ]
-            
-            self.goal_data = [
-                {
-                    'name': goal.name,
-                    'target_amount': goal.target_amount,
-                    'current_amount': goal.current_amount,
-                    'target_date': goal.target_date.strftime('%Y-%m-%d')
-                }
-                for goal in goals
-            ]
-            
-            # Calculate total expenses and savings
-            total_expenses = sum(expense.amount for expense in expenses)
-            total_budget = sum(budget.amount for budget in budgets)
-            
-            self.financial_summary = {
-                'total_expenses_6m': total_expenses,
-                'total_budget_6m': total_budget,
-                'expense_count': len(expenses),
-                'active_goals': len(goals)
-            }
+    def call(self, user_id):
+        """Get the user's cached financial context snapshot."""
+        return financial_context_cache.get(user_id)
 
-    def __init__(self, config):
-        genai.configure(api_key=config.GOOGLE_API_KEY)
-        
-        model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash-exp",
-        )
-        self.model = model
+    def __init__(self, config, llm=None):
+        # Model calls go through the gateway configured in create_app
+        self.llm = llm or llm_gateway
 
     def calculate_sip(self, monthly_investment: float, expected_return: float, years: int) -> dict:
         """Calculate SIP returns."""
         try:
-            monthly_rate = expected_return / (12 * 100)  # Convert percentage to monthly decimal
-            months = years * 12
-            
-            # Calculate future value using SIP formula
-            # FV = P * (((1 + r)^n - 1) / r) * (1 + r)
-            # where P is monthly investment, r is monthly rate, n is number of months
-            amount = monthly_investment * ((pow(1 + monthly_rate, months) - 1) / monthly_rate) * (1 + monthly_rate)
-            
-            total_investment = monthly_investment * months
-            total_returns = amount - total_investment
-            
+            # Same annuity-due projection as the batch engine, for one scenario
+            projection = project_sip(monthly_investment, expected_return, years)
             return {
-                'total_investment': round(total_investment, 2),
-                'total_returns': round(total_returns, 2),
-                'final_amount': round(amount, 2)
+                'total_investment': round(float(projection['total_investment'][0]), 2),
+                'total_returns': round(float(projection['total_returns'][0]), 2),
+                'final_amount': round(float(projection['final_amount'][0]), 2)
             }
         except Exception as e:
             print(f"Error calculating SIP: {str(e)}")
             raise
-    @lru_cache(maxsize=1)
-    def get_financial_advice(self, topic: str,user_id:int) -> dict:
-        self.call(user_id)
-        """Get AI-generated financial advice."""
-        prompt = f"""Provide concise, practical advice about {topic} in personal finance. Focus on actionable steps. Use markdown formatting for better readability.
-        
-        User's Financial Summary (Last 6 months):
-        - Total Expenses: ₹{self.financial_summary['total_expenses_6m']}
-        - Total Budgeted: ₹{self.financial_summary['total_budget_6m']}
-        - Number of Expenses: {self.financial_summary['expense_count']}
-        - Active Goals: {self.financial_summary['active_goals']}
-        
-        Recent Expenses: {self.expense_data if self.expense_data else 'No recent expenses'}
-        
-        Budget Information: {self.budget_data if self.budget_data else 'No budget set'}
-        
-        Financial Goals: {self.goal_data if self.goal_data else 'No goals set'}
-        
-        
+
+    def calculate_sip_scenarios(self, monthly_investment, expected_return, years, step_up=0.0, path='none') -> list:
+        """Calculate SIP returns for many scenarios in one vectorized pass.
+
+        path is 'none', 'yearly' (balance at each year end) or 'monthly'.
         """
-        response = self.model.generate_content(prompt)
-        text = response.text
+        projection = project_sip(monthly_investment, expected_return, years, step_up, with_paths=path != 'none')
+        amounts, rates, terms, step_ups = np.broadcast_arrays(
+            np.asarray(monthly_investment, dtype=float),
+            np.asarray(expected_return, dtype=float),
+            np.asarray(years, dtype=int),
+            np.asarray(step_up, dtype=float)
+        )
+        scenarios = []
+        for i, (amount, rate, term, step) in enumerate(zip(amounts.ravel(), rates.ravel(), terms.ravel(), step_ups.ravel())):
+            scenario = {
+                'monthly_investment': float(amount),
+                'expected_return': float(rate),
+                'years': int(term),
+                'step_up': float(step),
+                'total_investment': round(float(projection['total_investment'][i]), 2),
+                'total_returns': round(float(projection['total_returns'][i]), 2),
+                'final_amount': round(float(projection['final_amount'][i]), 2)
+            }
+            if path != 'none':
+                balances = projection['paths'][i, :term * 12 + 1]
+                if path == 'yearly':
+                    balances = balances[::12]
+                scenario['path'] = np.round(balances, 2).tolist()
+            scenarios.append(scenario)
+        return scenarios
+
+    def get_financial_advice(self, topic: str, user_id: int) -> dict:
+        """Get AI-generated financial advice, cached until the user's data changes."""
+        context = self.call(user_id)
+        key = advice_cache.key_for(user_id, topic, context.fingerprint)
+        return advice_cache.get(key, lambda: self._generate_advice(topic, context))
+
+    def _generate_advice(self, topic: str, context) -> dict:
+        prompt = prompt_builder.build(
+            f"Provide concise, practical advice about {topic} in personal finance. "
+            "Focus on actionable steps. Use markdown formatting for better readability.",
+            context
+        )
+        text = self.llm.generate(prompt)
         html = markdown.markdown(text)
         return {
             'text': text,
             'html': html
         }
+
     def Chat(self, topic: str, user_id: int) -> str:
         """Get AI-generated Chat with user context."""
         
-        self.call(user_id)
-        # Create context-aware prompt
-        prompt = f"""
-        You are a financial assistant bot. Use the following user data to provide personalized advice.
-        
-        User's Financial Summary (Last 6 months):
-        - Total Expenses: ₹{self.financial_summary['total_expenses_6m']}
-        - Total Budgeted: ₹{self.financial_summary['total_budget_6m']}
-        - Number of Expenses: {self.financial_summary['expense_count']}
-        - Active Goals: {self.financial_summary['active_goals']}
-        
-        Recent Expenses: {self.expense_data if self.expense_data else 'No recent expenses'}
-        
-        Budget Information: {self.budget_data if self.budget_data else 'No budget set'}
-        
-        Financial Goals: {self.goal_data if self.goal_data else 'No goals set'}
-        
-        User Query: {topic}
-        
-        """
-        
-        response = self.model.generate_content(prompt)
-        print(response.text)
-        text = response.text
+        prompt = self._chat_prompt(topic, user_id)
+        text = self.llm.generate(prompt)
+        print(text)
+        self._remember(user_id, topic, text)
         html = markdown.markdown(text)
         return {
             'text': text,
             'html': html
         }
 
+    def stream_chat(self, topic: str, user_id: int):
+        """Stream AI-generated Chat, yielding text chunks as the model produces them.
+
+        The caller saves the finished reply with remember_chat, after it has
+        told the client the reply is done.
+        """
+        prompt = self._chat_prompt(topic, user_id)
+        yield from self.llm.stream(prompt)
+
+    def remember_chat(self, user_id: int, question: str, answer: str):
+        """Add a finished exchange to the user's conversation memory."""
+        self._remember(user_id, question, answer)
+
+    def _chat_prompt(self, topic: str, user_id: int) -> str:
+        context = self.call(user_id)
+        # Create context-aware prompt
+        return prompt_builder.build(
+            "You are a financial assistant bot. Use the following user data and the conversation so far "
+            "to provide personalized advice.",
+            context,
+            query=topic,
+            history=conversation_store.history(user_id)
+        )
+
+    def _remember(self, user_id: int, question: str, answer: str):
+        try:
+            conversation_store.record_exchange(user_id, question, answer)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error saving chat history: {str(e)}")
+
     def analyze_expenses(self, expenses: list) -> dict:
         """Analyze expense patterns and provide insights."""
-        if not expenses:
+        categories = {}
+        for expense in expenses:
+            categories[expense.category] = categories.get(expense.category, 0) + expense.amount
+        return self.analyze_category_totals(categories)
+
+    def analyze_expense_history(self, user_id: int, start_date: datetime = None, end_date: datetime = None) -> dict:
+        """Analyze a user's expenses from database aggregates, optionally within a window.
+
+        Without a window the breakdown covers all history and the trend the
+        last 12 months; with one, both are bounded to [start_date, end_date].
+        """
+        if start_date is None and end_date is None:
+            categories = SpendRollupService.category_totals(user_id)
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=365)
+        else:
+            end_date = end_date or datetime.now()
+            start_date = start_date or end_date - timedelta(days=365)
+            categories = SpendRollupService.category_totals_between(user_id, start_date, end_date)
+
+        analysis = self.analyze_category_totals(categories)
+        monthly_data = SpendRollupService.monthly_trend(user_id, start_date, end_date)
+        analysis['monthly_trend'] = [
+            {
+                'month': datetime.strptime(month, '%Y-%m').strftime('%b %Y'),
+                'amount': amount
+            }
+            for month, amount in sorted(monthly_data.items())
+        ]
+        return analysis
+
+    def analyze_category_totals(self, categories: dict) -> dict:
+        """Build the spending breakdown from per-category totals."""
+        if not categories:
             return {
                 'total_spent': 0,
                 'breakdown': {},
                 'monthly_trend': []
             }
             
-        total_spent = sum(expense.amount for expense in expenses)
-        categories = {}
-        print(f"Analyzing {len(expenses)} expenses, total: {total_spent}")
-        
-        for expense in expenses:
-            categories[expense.category] = categories.get(expense.category, 0) + expense.amount
+        total_spent = sum(categories.values())
+        print(f"Analyzing {len(categories)} categories, total: {total_spent}")
             
         # Calculate percentage per category
         insights = {
@@ -188,18 +190,58 @@ class FinancialService:
         
         return insights
 
-    def calculate_goal_savings(self, target_amount: float, target_date: datetime, current_amount: float = 0) -> dict:
-        """Calculate monthly savings needed to reach a financial goal."""
-        months_remaining = (datetime(target_date) - datetime.now()).days / 30
-        amount_needed = target_amount - current_amount
+    def calculate_goal_savings(self, target_amount: float, target_date: datetime, current_amount: float = 0,
+                               expected_return: float = None, step_up: float = 0) -> dict:
+        """Calculate monthly savings needed to reach a financial goal.
+
+        With expected_return (% a year), also the starting SIP that gets
+        there once returns and an annual step_up are taken into account.
+        """
+        target_date = datetime.combine(target_date, datetime.min.time()) if not isinstance(target_date, datetime) else target_date
+        months_remaining = (target_date - datetime.now()).days / 30
+        amount_needed = target_amount - (current_amount or 0)
         
         if months_remaining <= 0:
             return {'error': 'Target date must be in the future'}
             
         monthly_saving = amount_needed / months_remaining
         
-        return {
+        plan = {
             'monthly_saving_needed': round(monthly_saving, 2),
             'total_amount_needed': round(amount_needed, 2),
             'months_remaining': round(months_remaining, 1)
         }
+        if expected_return is not None:
+            # under a month away the whole gap is one contribution
+            months = max(1, int(months_remaining))
+            sip = float(required_monthly_investment(target_amount, current_amount or 0, expected_return, months, step_up)[()])
+            plan['monthly_sip_needed'] = round(sip, 2) if math.isfinite(sip) else None
+        return plan
+
+    def simulate_goal(self, target_amount: float, target_date, current_amount: float = 0,
+                      monthly_contribution: float = None, expected_return: float = 10, volatility: float = 15,
+                      step_up: float = 0, paths: int = None, seed: int = 0) -> dict:
+        """Monte Carlo odds of reaching a goal by target_date with monthly contributions.
+
+        Without monthly_contribution, the linear plan from
+        calculate_goal_savings is tested.
+        """
+        today = datetime.now().date()
+        target_date = target_date.date() if isinstance(target_date, datetime) else target_date
+        months = (target_date.year - today.year) * 12 + target_date.month - today.month
+        if months <= 0:
+            return {'error': 'Target date must be in the future'}
+        if monthly_contribution is None:
+            monthly_contribution = max(target_amount - (current_amount or 0), 0) / months
+
+        result = goal_simulator.simulate(
+            target_amount, months,
+            current_amount=current_amount or 0,
+            monthly_contribution=monthly_contribution,
+            expected_return=expected_return,
+            volatility=volatility,
+            step_up=step_up,
+            paths=paths,
+            seed=seed
+        )
+        return {**result, 'monthly_contribution': round(monthly_contribution, 2)}
@@ -0,0 +1,144 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from sqlalchemy import extract, func
+from src.models import db, Expense, Budget, Goal
+from src.services.prompt_builder import prompt_builder
+from src.services.quote_cache import QuoteCache
+
+
+@dataclass(frozen=True)
+class FinancialContext:
+    """Read-only snapshot of the data the AI prompts are built from."""
+    user_id: int
+    version: int
+    recent_expenses: tuple
+    monthly_spend: tuple
+    budgets: tuple
+    goals: tuple
+    summary: MappingProxyType
+    built_at: datetime
+
+    @cached_property
+    def prompt_context(self):
+        """The summary and data sections shared by every prompt, rendered once."""
+        return prompt_builder.render_context(self)
+
+    @cached_property
+    def fingerprint(self):
+        """Content hash of the prompt context; changes whenever the data does."""
+        return hashlib.sha1(self.prompt_context.encode()).hexdigest()
+
+
+def build_financial_context(user_id, version=0):
+    """Aggregate a user's last 6 months of expenses and budgets, and their goals."""
+    six_months_ago = datetime.now() - timedelta(days=180)
+
+    year = extract('year', Expense.date)
+    month = extract('month', Expense.date)
+    monthly_spend = db.session.query(
+        Expense.category, year, month, func.sum(Expense.amount), func.count(Expense.id)
+    ).filter(Expense.user_id == user_id, Expense.date >= six_months_ago)\
+        .group_by(Expense.category, year, month)\
+        .order_by(year.desc(), month.desc(), func.sum(Expense.amount).desc())\
+        .all()
+    recent_expenses = Expense.query.filter_by(user_id=user_id)\
+        .filter(Expense.date >= six_months_ago)\
+        .order_by(Expense.date.desc(), Expense.id.desc())\
+        .limit(prompt_builder.recent_items).all()
+    budgets = Budget.query.filter_by(user_id=user_id)\
+        .filter(Budget.month >= six_months_ago)\
+        .order_by(Budget.month.desc())\
+        .all()
+    goals = Goal.query.filter_by(user_id=user_id).all()
+
+    return FinancialContext(
+        user_id=user_id,
+        version=version,
+        recent_expenses=tuple(
+            MappingProxyType({
+                'amount': expense.amount,
+                'category': expense.category,
+                'date': expense.date.strftime('%Y-%m-%d'),
+                'description': expense.description
+            })
+            for expense in recent_expenses
+        ),
+        monthly_spend=tuple(
+            MappingProxyType({
+                'month': f"{int(row_year):04d}-{int(row_month):02d}",
+                'category': category,
+                'total': total,
+                'count': count
+            })
+            for category, row_year, row_month, total, count in monthly_spend
+        ),
+        budgets=tuple(
+            MappingProxyType({
+                'category': budget.category,
+                'amount': budget.amount,
+                'month': budget.month.strftime('%Y-%m')
+            })
+            for budget in budgets
+        ),
+        goals=tuple(
+            MappingProxyType({
+                'name': goal.name,
+                'target_amount': goal.target_amount,
+                'current_amount': goal.current_amount,
+                'target_date': goal.target_date.strftime('%Y-%m-%d')
+            })
+            for goal in goals
+        ),
+        summary=MappingProxyType({
+            'total_expenses_6m': sum(row[3] for row in monthly_spend),
+            'total_budget_6m': sum(budget.amount for budget in budgets),
+            'expense_count': sum(row[4] for row in monthly_spend),
+            'active_goals': len(goals)
+        }),
+        built_at=datetime.now()
+    )
+
+
+class FinancialContextCache:
+    """Per-user FinancialContext snapshots, keyed by (user_id, data version).
+
+    Write paths call invalidate(user_id), which bumps the user's version so
+    the next read rebuilds; a read that raced the write can only populate
+    the old key. Versions are per process, so the TTL bounds staleness for
+    writes made by other workers and keeps the 6-month window current.
+    """
+
+    def __init__(self, ttl=300, max_size=256):
+        self._cache = QuoteCache(ttl=ttl, max_size=max_size)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def configure(self, ttl=None, max_size=None):
+        """Update TTL (seconds) and maximum number of cached users."""
+        self._cache.configure(ttl=ttl, max_size=max_size)
+
+    def version(self, user_id):
+        """Current data version for a user."""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get(self, user_id):
+        """Return the user's snapshot, building it on a miss."""
+        version = self.version(user_id)
+        return self._cache.get((user_id, version), lambda key: build_financial_context(*key))
+
+    def invalidate(self, user_id):
+        """Mark a user's financial data as changed."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def stats(self):
+        """Return the underlying cache counters."""
+        return self._cache.stats()
+
+
+financial_context_cache = FinancialContextCache()
@@ -0,0 +1,163 @@
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from src.services.quote_cache import QuoteCache
+
+CHUNK_PATHS = 10000
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_MONTHS = 600
+
+
+def simulate_chunk(seed_state, paths, months, current_amount, monthly_contribution,
+                   expected_return, volatility, step_up=0.0):
+    """Simulate one block of paths and return balances at each year end (and the final month).
+
+    Monthly log returns are normal with sigma = volatility / sqrt(12) and a
+    drift chosen so the mean annual growth is expected_return (% a year).
+    Contributions are made at the start of each month, like a SIP, and
+    step up by step_up % every 12 months. The recursion
+    balance = (balance + contribution) * growth is evaluated in closed form
+    with cumulative sums, so there is no Python loop over months.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(**seed_state))
+    sigma = volatility / 100 / math.sqrt(12)
+    drift = math.log1p(expected_return / 100) / 12 - sigma ** 2 / 2
+
+    # months run down axis 0 so the cumulative sums work on contiguous rows;
+    # float32 draws are much cheaper and the sums are still taken in float64
+    log_growth = rng.standard_normal(size=(months, paths), dtype=np.float32).astype(np.float64)
+    log_growth *= sigma
+    log_growth += drift
+    np.cumsum(log_growth, axis=0, out=log_growth)
+
+    # deposits[t] = sum of contribution_j / growth before month j, for j <= t
+    contributions = monthly_contribution * (1 + step_up / 100) ** (np.arange(months) // 12)
+    deposits = np.empty_like(log_growth)
+    deposits[0] = 1.0
+    np.exp(-log_growth[:-1], out=deposits[1:])
+    deposits *= contributions[:, None]
+    np.cumsum(deposits, axis=0, out=deposits)
+    deposits += current_amount
+    balances = np.exp(log_growth, out=log_growth)
+    balances *= deposits
+
+    checkpoints = sorted(set(range(11, months, 12)) | {months - 1})
+    return np.column_stack([np.full(paths, float(current_amount)), balances[checkpoints].T])
+
+
+class GoalSimulator:
+    """Seeded Monte Carlo projections of whether a goal will be reached.
+
+    Paths are simulated in fixed blocks of CHUNK_PATHS, each with its own
+    child of the run's SeedSequence, so a given seed gives identical
+    results whether the blocks run inline or on the process pool. Results
+    are cached by their full input tuple.
+    """
+
+    def __init__(self, paths=10000, max_paths=100000, workers=0, pool_threshold=50000, ttl=3600, max_size=256):
+        self.paths = paths
+        self.max_paths = max_paths
+        self.workers = workers
+        self.pool_threshold = pool_threshold
+        self._cache = QuoteCache(ttl=ttl, max_size=max_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, paths=None, max_paths=None, workers=None, pool_threshold=None, ttl=None, max_size=None):
+        """Update the default and maximum path counts, pool size and cache limits."""
+        with self._lock:
+            if paths is not None:
+                self.paths = paths
+            if max_paths is not None:
+                self.max_paths = max_paths
+            if pool_threshold is not None:
+                self.pool_threshold = pool_threshold
+            if workers is not None and workers != self.workers:
+                self.workers = workers
+                self._shutdown_executor()
+        self._cache.configure(ttl=ttl, max_size=max_size)
+
+    def simulate(self, target_amount, months, current_amount=0.0, monthly_contribution=0.0,
+                 expected_return=10.0, volatility=15.0, step_up=0.0, paths=None, seed=0):
+        """Return success probability, final-balance percentiles and yearly percentile bands."""
+        paths = paths or self.paths
+        if not 0 < paths <= self.max_paths:
+            raise ValueError(f'paths must be between 1 and {self.max_paths}')
+        if not 0 < months <= MAX_MONTHS:
+            raise ValueError(f'The goal must be between 1 and {MAX_MONTHS} months away')
+        key = (
+            float(target_amount), int(months), float(current_amount), float(monthly_contribution),
+            float(expected_return), float(volatility), float(step_up), int(paths), int(seed)
+        )
+        return self._cache.get(key, lambda key: self._simulate(*key))
+
+    def stats(self):
+        """Return cache counters and pool settings."""
+        stats = self._cache.stats()
+        stats.update({'workers': self.workers, 'pool_threshold': self.pool_threshold, 'default_paths': self.paths})
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown_executor()
+
+    def _simulate(self, target_amount, months, current_amount, monthly_contribution,
+                  expected_return, volatility, step_up, paths, seed):
+        sizes = [min(CHUNK_PATHS, paths - start) for start in range(0, paths, CHUNK_PATHS)]
+        seeds = [
+            {'entropy': child.entropy, 'spawn_key': child.spawn_key}
+            for child in np.random.SeedSequence(seed).spawn(len(sizes))
+        ]
+        args = [
+            (seed_state, size, months, current_amount, monthly_contribution, expected_return, volatility, step_up)
+            for seed_state, size in zip(seeds, sizes)
+        ]
+        balances = np.concatenate(self._run_chunks(args, paths))
+
+        final = balances[:, -1]
+        bands = np.percentile(balances, PERCENTILES, axis=0)
+        checkpoints = sorted(set(range(12, months + 1, 12)) | {months})
+        return {
+            'paths': paths,
+            'months': months,
+            'seed': seed,
+            'success_probability': round(float(np.mean(final >= target_amount)), 4),
+            'final_balance': {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, bands[:, -1])},
+            'expected_shortfall': round(float(np.mean(np.maximum(target_amount - final, 0))), 2),
+            'bands': {
+                'month': [0] + checkpoints,
+                **{f'p{p}': np.round(band, 2).tolist() for p, band in zip(PERCENTILES, bands)}
+            }
+        }
+
+    def _run_chunks(self, args, paths):
+        if self.workers and len(args) > 1 and paths >= self.pool_threshold:
+            try:
+                return list(self._get_executor().map(simulate_chunk, *zip(*args)))
+            except BrokenProcessPool as e:
+                # a worker died; the chunks are seeded, so running them inline gives the same result
+                print(f"Error in goal simulation pool, running inline: {str(e)}")
+                with self._lock:
+                    self._shutdown_executor()
+        return [simulate_chunk(*chunk_args) for chunk_args in args]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent has live threads (refresher, request workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+goal_simulator = GoalSimulator()
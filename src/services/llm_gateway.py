@@ -0,0 +1,321 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    TRANSIENT_ERRORS = (
+        ConnectionError,
+        TimeoutError,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded
+    )
+except ImportError:
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+
+class LLMError(Exception):
+    """Base class for gateway errors that should become a 503 for the caller."""
+
+
+class LLMBusy(LLMError):
+    """Raised when every model slot is taken and the caller should back off."""
+
+
+class LLMTimeout(LLMError):
+    """Raised when the model does not answer within the per-call deadline."""
+
+
+class LLMUnavailable(LLMError):
+    """Raised while the circuit breaker is open after repeated failures."""
+
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """Offline stand-in for genai.GenerativeModel used in load tests.
+
+    Sleeps for a configurable latency and returns canned markdown, either
+    whole or split into chunks for stream=True; failure_rate injects
+    transient errors to exercise retries and the circuit breaker. Like the
+    SDK, request_options={'timeout': ...} bounds the call.
+    """
+
+    def __init__(self, latency=0.5, chunks=5, failure_rate=0.0):
+        self.latency = latency
+        self.chunks = chunks
+        self.failure_rate = failure_rate
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        timeout = (request_options or {}).get('timeout')
+        if random.random() < self.failure_rate:
+            raise ConnectionError('Stub model failure')
+        words = f"**Stub advice.** Your prompt was {len(prompt)} characters long. " \
+            "Track spending, keep an emergency fund and review your goals monthly.".split(' ')
+        size = max(1, len(words) // self.chunks)
+        parts = [' '.join(words[i:i + size]) + ' ' for i in range(0, len(words), size)]
+        if not stream:
+            self._wait(self.latency, timeout)
+            return _StubResponse(''.join(parts))
+        return self._stream(parts, timeout)
+
+    def _stream(self, parts, timeout):
+        for part in parts:
+            self._wait(self.latency / len(parts), timeout)
+            yield _StubResponse(part)
+
+    @staticmethod
+    def _wait(latency, timeout):
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f'Stub model exceeded {timeout}s')
+        time.sleep(latency)
+
+
+def create_model(provider='gemini', api_key=None, model_name='gemini-2.0-flash-exp', stub_latency=0.5):
+    """Build the generative model behind the gateway."""
+    if provider == 'stub':
+        return StubGenerativeModel(latency=stub_latency)
+    if provider != 'gemini':
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name=model_name)
+
+
+class LLMGateway:
+    """Runs model calls on a bounded thread pool, away from request threads' fate.
+
+    At most max_concurrency calls are in flight; callers wait up to
+    queue_timeout for a slot and then get LLMBusy. Each call has a deadline,
+    passed to the model as well so a hung upstream call cannot keep its slot,
+    transient errors are retried with jittered exponential backoff, and
+    after failure_threshold consecutive failures the breaker opens and
+    calls fail fast for reset_after seconds before one trial call is let
+    through.
+    """
+
+    def __init__(self, model=None, max_concurrency=4, queue_timeout=2, timeout=30,
+                 retries=2, backoff=0.5, failure_threshold=5, reset_after=30):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._counters = {
+            'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'timeouts': 0, 'rejected': 0, 'abandoned': 0
+        }
+
+    def configure(self, model=None, max_concurrency=None, queue_timeout=None, timeout=None,
+                  retries=None, backoff=None, failure_threshold=None, reset_after=None):
+        """Set the model and limits; a new concurrency limit applies to new calls."""
+        with self._lock:
+            if model is not None:
+                self.model = model
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+                self._slots = threading.BoundedSemaphore(max_concurrency)
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            for name, value in (
+                ('queue_timeout', queue_timeout), ('timeout', timeout), ('retries', retries),
+                ('backoff', backoff), ('failure_threshold', failure_threshold), ('reset_after', reset_after)
+            ):
+                if value is not None:
+                    setattr(self, name, value)
+
+    def generate(self, prompt):
+        """Return the model's full text for prompt."""
+        slots = self._acquire()
+        try:
+            future = self._get_executor().submit(self._call_with_retries, prompt)
+        except Exception:
+            slots.release()
+            self._abandon()
+            raise
+        # the slot is held until the model call really ends, even if we stop waiting
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            text = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._record(False, timed_out=True)
+            raise LLMTimeout(f"Model did not answer within {self.timeout}s")
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return text
+
+    def stream(self, prompt):
+        """Yield text chunks as the model produces them.
+
+        The deadline applies to the wait for each chunk; retries only happen
+        before the first chunk has been delivered. If the caller stops early
+        (e.g. the SSE client disconnects) the model call is abandoned and the
+        outcome counts as neither success nor failure.
+        """
+        slots = self._acquire()
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for attempt in range(self.retries + 1):
+                    started = False
+                    try:
+                        response = self.model.generate_content(
+                            prompt, stream=True, request_options={'timeout': self.timeout}
+                        )
+                        for chunk in response:
+                            if cancelled.is_set():
+                                return
+                            if chunk.text:
+                                started = True
+                                chunks.put(('chunk', chunk.text))
+                        chunks.put(('done', None))
+                        return
+                    except TRANSIENT_ERRORS as e:
+                        if started or attempt == self.retries or cancelled.is_set():
+                            chunks.put(('error', e))
+                            return
+                        self._sleep_before_retry(attempt)
+                    except Exception as e:
+                        chunks.put(('error', e))
+                        return
+            finally:
+                slots.release()
+
+        try:
+            self._get_executor().submit(produce)
+        except Exception:
+            slots.release()
+            self._abandon()
+            raise
+
+        finished = False
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=self.timeout)
+                except queue.Empty:
+                    finished = True
+                    cancelled.set()  # stop taking chunks from the stalled stream
+                    self._record(False, timed_out=True)
+                    raise LLMTimeout(f"Model stalled for more than {self.timeout}s")
+                if kind == 'chunk':
+                    yield value
+                elif kind == 'done':
+                    finished = True
+                    self._record(True)
+                    return
+                else:
+                    finished = True
+                    self._record(False)
+                    raise value
+        finally:
+            if not finished:
+                # closed early: stop the producer and free a half-open trial
+                cancelled.set()
+                self._abandon()
+
+    def stats(self):
+        """Return call counters, in-flight calls and the breaker state."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'breaker': self._breaker_state(),
+                'consecutive_failures': self._failures,
+                'max_concurrency': self.max_concurrency,
+                'timeout': self.timeout,
+                'model': type(self.model).__name__ if self.model is not None else None
+            })
+        return stats
+
+    def _acquire(self):
+        if self.model is None:
+            raise LLMUnavailable('No model configured')
+        with self._lock:
+            state = self._breaker_state()
+            if state == 'open' or (state == 'half-open' and self._trial_in_flight):
+                self._counters['rejected'] += 1
+                raise LLMUnavailable('AI service is temporarily unavailable, try again shortly')
+            if state == 'half-open':
+                self._trial_in_flight = True
+            slots = self._slots
+        if not slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._counters['rejected'] += 1
+                if state == 'half-open':
+                    self._trial_in_flight = False
+            raise LLMBusy('AI service is busy, try again shortly')
+        with self._lock:
+            self._counters['calls'] += 1
+        return slots
+
+    def _call_with_retries(self, prompt):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.model.generate_content(prompt, request_options={'timeout': self.timeout}).text
+            except TRANSIENT_ERRORS:
+                if attempt == self.retries:
+                    raise
+                self._sleep_before_retry(attempt)
+
+    def _sleep_before_retry(self, attempt):
+        with self._lock:
+            self._counters['retries'] += 1
+        # full jitter keeps retrying workers from hitting the API in lockstep
+        time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _record(self, success, timed_out=False):
+        with self._lock:
+            self._trial_in_flight = False
+            if success:
+                self._counters['succeeded'] += 1
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._counters['failed'] += 1
+            if timed_out:
+                self._counters['timeouts'] += 1
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def _abandon(self):
+        with self._lock:
+            self._trial_in_flight = False
+            self._counters['abandoned'] += 1
+
+    def _breaker_state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at < self.reset_after:
+            return 'open'
+        return 'half-open'
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm-gateway')
+            return self._executor
+
+
+llm_gateway = LLMGateway()
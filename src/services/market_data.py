@@ -1,27 +1,86 @@
-import yfinance as yf
 from functools import lru_cache
 from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
 from flask_login import current_user
-from src.models import db, User
-import io
-import base64
-import matplotlib.pyplot as plt
+from sqlalchemy.exc import IntegrityError
+from src.models import db, User, WatchlistItem
+from src.services.quote_cache import quote_cache
+from src.services.market_providers import get_provider
+from src.services.chart_renderer import chart_render_pool, render_weekly_performance
+import re
+
+TICKER_PATTERN = re.compile(r'[A-Z0-9.^=\-]{1,15}')  # fits WatchlistItem.ticker (String(20))
+
+TOP_STOCKS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'BRK-B', 'V', 'JNJ', 'WMT', 'JPM', 
+              'PG', 'UNH', 'NVDA', 'HD', 'DIS', 'PYPL', 'MA', 'VZ', 'ADBE', 'NFLX']
 
 def fetch_top_stocks():
     """Get data for top stocks."""
-    top_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'BRK-B', 'V', 'JNJ', 'WMT', 'JPM', 
-                  'PG', 'UNH', 'NVDA', 'HD', 'DIS', 'PYPL', 'MA', 'VZ', 'ADBE', 'NFLX']
-    stocks_data = []
-    for ticker in top_stocks:
-        stocks_data.append(fetch_stock_info(ticker))
-    return stocks_data
+    return fetch_stock_quotes(TOP_STOCKS)
 
 def fetch_stock_info(ticker):
-    """Get information for a specific stock."""
-    stock_data = []
+    """Get information for a specific stock, served from the shared quote cache."""
     ticker = ticker.upper().strip()
-    stock = yf.Ticker(ticker)
-    stock_info = stock.history(period='1d')
+    return quote_cache.get(ticker, _fetch_stock_info)
+
+def fetch_stock_quotes(tickers):
+    """Get information for many stocks, fetching all cache misses in one batch.
+
+    Returns one entry per ticker in the order given; tickers with no data
+    come back as an empty list, the same as fetch_stock_info.
+    """
+    tickers = [ticker.upper().strip() for ticker in tickers if ticker and ticker.strip()]
+    quotes = quote_cache.get_many(tickers, _fetch_stock_quotes, default=[])
+    return [quotes[ticker] for ticker in tickers]
+
+def refresh_stock_quotes(tickers, ttl=None):
+    """Fetch quotes for tickers upstream and overwrite the shared cache entries."""
+    tickers = list(dict.fromkeys(ticker.upper().strip() for ticker in tickers if ticker and ticker.strip()))
+    if not tickers:
+        return {}
+    quotes = _fetch_stock_quotes(tickers)
+    for ticker, quote in quotes.items():
+        if quote:
+            quote_cache.set(ticker, quote, ttl=ttl)
+    return quotes
+
+def fetch_index_quote(symbol):
+    """Get the current open, change and change percent for a market index."""
+    info = get_provider().info(symbol)
+    price = info['open']
+    previous_close = info.get('previousClose', price)
+    change = price - previous_close
+    return {
+        'price': price,
+        'change': change,
+        'change_percent': f"{(change / previous_close) * 100 if previous_close else 0:.2f}%",
+        'last_updated': datetime.now().strftime('%Y-%m-%d')
+    }
+
+def _fetch_stock_info(ticker):
+    """Fetch the latest quote for a stock from upstream."""
+    return _quote_from_history(ticker, get_provider().history(ticker, period='1d'))
+
+def _fetch_stock_quotes(tickers):
+    """Fetch the latest quotes for many stocks with a single batched download."""
+    history = get_provider().download(tickers, period='1d')
+    quotes = {}
+    for ticker in tickers:
+        if ticker not in history.columns.get_level_values(0):
+            quotes[ticker] = []
+            continue
+        quotes[ticker] = _quote_from_history(ticker, history[ticker].dropna(how='all'))
+
+    missing = [ticker for ticker, quote in quotes.items() if not quote]
+    if missing:
+        print(f"No quote data for: {', '.join(missing)}")
+    return quotes
+
+def _quote_from_history(ticker, stock_info):
+    """Build the quote dict from a daily OHLCV frame, or [] if it is empty."""
+    stock_data = []
     if not stock_info.empty:
         row = stock_info.iloc[-1]
         price = row['Open']
@@ -40,134 +99,148 @@ def fetch_stock_info(ticker):
         }
     return stock_data
 
-def plot_stocks(stocks_watchlist):
-    """Generate performance plot for watchlist stocks."""
-    yf_period = "1mo"
-    yf_interval = "1d"
-    yf_returns = yf.download(
-        tickers=stocks_watchlist,
+def render_stocks_chart(stocks_watchlist, yf_period="1mo", yf_interval="1d"):
+    """Render weekly percent change for watchlist stocks to PNG bytes."""
+    yf_returns = get_provider().download(
+        stocks_watchlist,
         period=yf_period,
         interval=yf_interval,
-        group_by='ticker',
-        auto_adjust=True,
-        prepost=True,
-        threads=True,
-        proxy=None
+        prepost=True
     )
 
     yf_returns = yf_returns.iloc[:, yf_returns.columns.get_level_values(1)=='Close']
     yf_returns.columns = yf_returns.columns.droplevel(1)
     yf_returns = round(yf_returns.pct_change()*100, 2)
 
-    col_order = []
-    for i in stocks_watchlist:
-        col_order.append(i)
+    # providers leave out tickers they have no data for
+    col_order = [ticker for ticker in stocks_watchlist if ticker in yf_returns.columns]
+    if not col_order:
+        raise LookupError(f"No price history for {', '.join(stocks_watchlist)}")
 
     yf_returns = yf_returns[col_order]
     perf_dy = yf_returns
     perf_dy['WEEK'] = perf_dy.index.strftime("%Y-%U")
     perf_wk = perf_dy.groupby('WEEK').sum()
 
-    plt.figure(figsize=(10,6))
-    plt.plot(perf_wk[stocks_watchlist])
-    plt.title('SYMBOLS', fontsize=14)
-    plt.ylabel('percent change', fontsize=14)
-    plt.legend(perf_wk[stocks_watchlist], loc="upper left", bbox_to_anchor=(1,1))
-    plt.xticks(rotation=90)
-    plt.tight_layout()
+    return chart_render_pool.render(render_weekly_performance, perf_wk[col_order])
 
-    img = io.BytesIO()
-    plt.savefig(img, format='png')
-    img.seek(0)
-    plot_url = base64.b64encode(img.getvalue()).decode()
-    plt.close()
+class MarketDataService:
+    INDICES = {'sp': '^GSPC'}
 
-    return plot_url
+    def __init__(self, index_max_age=3600):
+        self.index_max_age = index_max_age
+        self._indices = {}  # name -> (data, refreshed_at)
+        self._indices_lock = threading.Lock()
+        self._lookup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='market-lookup')
 
-class MarketDataService:
-    def __init__(self):
-        pass
+    def refresh_indices(self):
+        """Fetch every tracked index upstream and store it in the snapshot.
+
+        Returns the names of indices that could not be refreshed; they keep
+        their previous snapshot.
+        """
+        failed = []
+        for name, symbol in self.INDICES.items():
+            try:
+                data = fetch_index_quote(symbol)
+            except Exception as e:
+                print(f"Error refreshing index {symbol}: {str(e)}")
+                failed.append(name)
+                continue
+            with self._indices_lock:
+                self._indices[name] = (data, time.monotonic())
+        return failed
+
+    def get_index(self, name):
+        """Get an index from the snapshot, fetching it live if missing or too old."""
+        with self._indices_lock:
+            entry = self._indices.get(name)
+        if entry is not None and time.monotonic() - entry[1] <= self.index_max_age:
+            return entry[0]
+        data = fetch_index_quote(self.INDICES[name])
+        with self._indices_lock:
+            self._indices[name] = (data, time.monotonic())
+        return data
 
     def get_market_indices(self):
         """Get current market indices data."""
         try:
-            # Get sp 50 data using yfinance
-            sp = yf.Ticker("^GSPC")  # sp 50 symbol
-            info = sp.info
-            price =info['open']
-            previous_close = info.get('previousClose', price)
-            change = price - previous_close
-            data = {
-                'sp': {
-                    'price': price,
-                    'change': change,
-                    'change_percent': f"{(change / previous_close) * 100 if previous_close else 0:.2f}%",
-                    'last_updated': datetime.now().strftime('%Y-%m-%d')
-                }
-            }
+            tickers = self.get_watchlist() if current_user.is_authenticated else []
+            # the index lookup runs alongside the watchlist download
+            index_future = self._lookup_pool.submit(self.get_index, 'sp')
+            stocks = self.get_user_stocks(tickers) if tickers else None
+            data = {'sp': index_future.result()}
             
             # Add user's stock data if logged in
-            if current_user.is_authenticated and current_user.stock_tickers:
-                data['stocks'] = self.get_user_stocks()
+            if tickers:
+                data['stocks'] = stocks
             return data
         except Exception as e:
             return {'error': str(e)}
 
-    def get_user_stocks(self):
-        """Get stock data for user's watchlist."""
-        if not current_user.stock_tickers:
+    def get_user_stocks(self, tickers=None):
+        """Get stock data for user's watchlist.
+
+        One batched 2-day download covers every ticker; the previous close
+        is the earlier bar's Close.
+        """
+        if tickers is None:
+            tickers = self.get_watchlist()
+        if not tickers:
             return []
-            
+
+        try:
+            history = get_provider().download(tickers, period='2d')
+        except Exception as e:
+            print(f"Error fetching data for {', '.join(tickers)}: {str(e)}")
+            return []
+
         stocks_data = []
-        tickers = current_user.stock_tickers.split(',')
-        
+        available = set(history.columns.get_level_values(0))
         for ticker in tickers:
-            ticker = ticker.strip()
-            if not ticker:
+            if ticker not in available:
                 continue
-                
-            try:
-                stock = yf.Ticker(ticker)
-                history = stock.history(period='1d')
-                if history.empty:
-                    continue
-                    
-                row = history.iloc[-1]
-                price = row['Close']
-                previous_close = stock.info.get('previousClose', price)
-                change = price - previous_close
-                
-                stocks_data.append({
-                    'ticker': ticker,
-                    'price': f"{price:.2f}",
-                    'high': f"{row['High']:.2f}",
-                    'low': f"{row['Low']:.2f}",
-                    'volume': f"{row['Volume']:.2f}",
-                    'previous_close': f"{previous_close:.2f}",
-                    'change': f"{change:.2f}",
-                    'change_percent': f"{(change / previous_close) * 100 if previous_close else 0:.2f}",
-                    'date_time': row.name.strftime('%Y-%m-%d')
-                })
-            except Exception as e:
-                print(f"Error fetching data for {ticker}: {str(e)}")
+            bars = history[ticker].dropna(subset=['Close'])
+            if bars.empty:
                 continue
-                
+
+            row = bars.iloc[-1]
+            price = row['Close']
+            previous_close = bars['Close'].iloc[-2] if len(bars) > 1 else price
+            change = price - previous_close
+
+            stocks_data.append({
+                'ticker': ticker,
+                'price': f"{price:.2f}",
+                'high': f"{row['High']:.2f}",
+                'low': f"{row['Low']:.2f}",
+                'volume': f"{row['Volume']:.2f}",
+                'previous_close': f"{previous_close:.2f}",
+                'change': f"{change:.2f}",
+                'change_percent': f"{(change / previous_close) * 100 if previous_close else 0:.2f}",
+                'date_time': row.name.strftime('%Y-%m-%d')
+            })
+
         return stocks_data
 
     def add_stock_to_watchlist(self, ticker):
-        """Add a stock to user's watchlist."""
+        """Add a stock to user's watchlist; raises ValueError for a malformed symbol."""
         if not current_user.is_authenticated:
             return False
             
-        tickers = set(current_user.stock_tickers.split(',')) if current_user.stock_tickers else set()
         ticker = ticker.strip().upper()
-        
-        if ticker in tickers:
+        if not TICKER_PATTERN.fullmatch(ticker):
+            raise ValueError(f"Invalid ticker symbol: {ticker[:20]}")
+        if WatchlistItem.query.filter_by(user_id=current_user.id, ticker=ticker).first():
             return False
             
-        tickers.add(ticker)
-        current_user.stock_tickers = ','.join(filter(None, tickers))
-        db.session.commit()
+        db.session.add(WatchlistItem(user_id=current_user.id, ticker=ticker))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # added concurrently by another request
+            db.session.rollback()
+            return False
         return True
 
     def remove_stock_from_watchlist(self, ticker):
@@ -175,16 +248,33 @@ class MarketDataService:
         if not current_user.is_authenticated:
             return False
             
-        tickers = set(current_user.stock_tickers.split(',')) if current_user.stock_tickers else set()
         ticker = ticker.strip().upper()
-        
-        if ticker not in tickers:
-            return False
-            
-        tickers.remove(ticker)
-        current_user.stock_tickers = ','.join(filter(None, tickers))
+        removed = WatchlistItem.query.filter_by(user_id=current_user.id, ticker=ticker).delete()
         db.session.commit()
-        return True
+        return removed > 0
+
+    def get_watchlist(self, user_id=None):
+        """Get the tickers on a user's watchlist (default: current user), oldest first."""
+        if user_id is None:
+            if not current_user.is_authenticated:
+                return []
+            user_id = current_user.id
+        rows = WatchlistItem.query.with_entities(WatchlistItem.ticker)\
+            .filter_by(user_id=user_id)\
+            .order_by(WatchlistItem.id).all()
+        return [ticker for (ticker,) in rows]
+
+    @staticmethod
+    def get_watched_tickers():
+        """Get every distinct ticker on any user's watchlist."""
+        rows = db.session.query(WatchlistItem.ticker).distinct().order_by(WatchlistItem.ticker).all()
+        return [ticker for (ticker,) in rows]
+
+    @staticmethod
+    def get_watchers(ticker):
+        """Get the ids of users watching a ticker."""
+        rows = db.session.query(WatchlistItem.user_id).filter_by(ticker=ticker.strip().upper()).all()
+        return [user_id for (user_id,) in rows]
 
     def get_mutual_fund_nav(self, scheme_code):
         """Get mutual fund NAV data."""
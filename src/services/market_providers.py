@@ -0,0 +1,214 @@
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+import pandas as pd
+import yfinance as yf
+
+
+class MarketDataProvider(ABC):
+    """Interface for the market data backends behind src.services.market_data.
+
+    Frames are daily-or-coarser OHLCV with a DatetimeIndex. download() always
+    returns (ticker, field) MultiIndex columns and leaves out tickers it has
+    no data for.
+    """
+
+    @abstractmethod
+    def history(self, ticker, period='1mo', interval='1d'):
+        """Get OHLCV bars for one ticker."""
+
+    @abstractmethod
+    def download(self, tickers, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        """Get OHLCV bars for many tickers in one call."""
+
+    @abstractmethod
+    def info(self, symbol):
+        """Get a quote summary with at least 'open' and 'previousClose'."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance."""
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def download(self, tickers, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        options = {'auto_adjust': True, 'threads': True, 'progress': False}
+        options.update(kwargs)
+        if start is not None or end is not None:
+            options.update(start=start, end=end)
+        else:
+            options['period'] = period
+        frame = yf.download(tickers=list(tickers), interval=interval, group_by='ticker', **options)
+        if not isinstance(frame.columns, pd.MultiIndex):
+            frame = pd.concat({list(tickers)[0]: frame}, axis=1)
+        return frame
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+
+_PERIOD_PATTERN = re.compile(r'(\d+)(d|wk|mo|y)')
+_RESAMPLE_RULES = {'1wk': 'W', '1mo': 'MS', '3mo': 'QS'}
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serve recorded OHLCV from <data_dir>/<TICKER>.parquet or .csv files.
+
+    Periods are measured back from the last recorded bar, so a recording
+    replays the same way on any day. latency (seconds) is slept once per
+    call to stand in for an upstream round trip.
+    """
+
+    def __init__(self, data_dir, latency=0.0):
+        self.data_dir = data_dir
+        self.latency = latency
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        self._simulate_latency()
+        return self._slice(self._load(ticker), period, interval)
+
+    def download(self, tickers, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        self._simulate_latency()
+        frames = {}
+        for ticker in tickers:
+            frame = self._load(ticker)
+            if start is not None or end is not None:
+                frame = self._resample(frame.loc[start:end], interval)
+            else:
+                frame = self._slice(frame, period, interval)
+            if not frame.empty:
+                frames[ticker] = frame
+        if not frames:
+            return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['Ticker', 'Price']))
+        return pd.concat(frames, axis=1).sort_index()
+
+    def info(self, symbol):
+        self._simulate_latency()
+        frame = self._load(symbol)
+        if frame.empty:
+            return {}
+        last = frame.iloc[-1]
+        previous_close = frame['Close'].iloc[-2] if len(frame) > 1 else last['Close']
+        return {
+            'symbol': symbol,
+            'open': float(last['Open']),
+            'dayHigh': float(last['High']),
+            'dayLow': float(last['Low']),
+            'volume': float(last['Volume']),
+            'previousClose': float(previous_close)
+        }
+
+    def _simulate_latency(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _load(self, ticker):
+        with self._lock:
+            if ticker in self._frames:
+                return self._frames[ticker]
+
+        frame = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        for suffix, reader in (('.parquet', pd.read_parquet), ('.csv', _read_csv)):
+            path = os.path.join(self.data_dir, f"{ticker}{suffix}")
+            if os.path.exists(path):
+                frame = reader(path)
+                frame.index = pd.to_datetime(frame.index)
+                frame = frame.sort_index()
+                break
+
+        with self._lock:
+            self._frames[ticker] = frame
+        return frame
+
+    def _slice(self, frame, period, interval):
+        if frame.empty or period == 'max':
+            return self._resample(frame, interval)
+        last = frame.index[-1]
+        if period == 'ytd':
+            return self._resample(frame[frame.index.year == last.year], interval)
+
+        match = _PERIOD_PATTERN.fullmatch(period)
+        if match is None:
+            raise ValueError(f"Unsupported period: {period}")
+        count, unit = int(match.group(1)), match.group(2)
+        if unit == 'd':
+            # daily periods count trading days, like Yahoo
+            return self._resample(frame.iloc[-count:], interval)
+        offset = {
+            'wk': pd.DateOffset(weeks=count),
+            'mo': pd.DateOffset(months=count),
+            'y': pd.DateOffset(years=count)
+        }[unit]
+        return self._resample(frame[frame.index > last - offset], interval)
+
+    def _resample(self, frame, interval):
+        return resample_bars(frame, interval)
+
+
+def resample_bars(frame, interval):
+    """Aggregate daily OHLCV bars to a coarser interval ('1wk', '1mo' or '3mo')."""
+    if interval == '1d' or frame.empty:
+        return frame
+    if interval not in _RESAMPLE_RULES:
+        raise ValueError(f"Unsupported interval for daily data: {interval}")
+    return frame.resample(_RESAMPLE_RULES[interval]).agg({
+        'Open': 'first',
+        'High': 'max',
+        'Low': 'min',
+        'Close': 'last',
+        'Volume': 'sum'
+    }).dropna(how='all')
+
+
+def _read_csv(path):
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def record_history(tickers, data_dir, period='1y', file_format='csv', source=None):
+    """Record daily OHLCV for tickers from source into files ReplayProvider can serve."""
+    source = source or YFinanceProvider()
+    os.makedirs(data_dir, exist_ok=True)
+    frame = source.download(tickers, period=period, interval='1d')
+    recorded = []
+    for ticker in tickers:
+        if ticker not in frame.columns.get_level_values(0):
+            print(f"No data recorded for {ticker}")
+            continue
+        bars = frame[ticker].dropna(how='all')
+        path = os.path.join(data_dir, f"{ticker}.{file_format}")
+        if file_format == 'parquet':
+            bars.to_parquet(path)
+        else:
+            bars.to_csv(path)
+        recorded.append(ticker)
+    return recorded
+
+
+_provider = YFinanceProvider()
+
+
+def get_provider():
+    """Get the market data provider used by the market data helpers."""
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the market data provider, e.g. for replaying recorded data."""
+    global _provider
+    _provider = provider
+
+
+def create_provider(name, replay_dir=None, replay_latency=0.0):
+    """Build a provider from configuration ('yfinance' or 'replay')."""
+    if name == 'replay':
+        if not replay_dir:
+            raise ValueError('MARKET_REPLAY_DIR is required for the replay provider')
+        return ReplayProvider(replay_dir, latency=replay_latency)
+    if name == 'yfinance':
+        return YFinanceProvider()
+    raise ValueError(f"Unknown market data provider: {name}")
@@ -0,0 +1,106 @@
+import threading
+import time
+from datetime import datetime, time as dt_time
+from zoneinfo import ZoneInfo
+from src.services.market_data import TOP_STOCKS, refresh_stock_quotes
+
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+
+def is_market_open(now=None):
+    """Check whether US equity markets are in regular trading hours."""
+    now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+class MarketDataRefresher:
+    """Background thread that keeps quotes and indices warm for request handlers.
+
+    Each pass refreshes the top-stocks universe, every ticker on any user's
+    watchlist and the tracked indices, then records when it last succeeded.
+    """
+
+    def __init__(self, app, market_service, open_interval=60, closed_interval=1800):
+        self.app = app
+        self.market_service = market_service
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_refresh = None
+        self._last_refresh_at = None
+        self._last_duration = None
+        self._last_error = None
+        self._ticker_count = 0
+
+    def start(self):
+        """Start the refresher thread if it is not already running; safe to call from every request."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            # concurrent first requests: only one of them starts the thread
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='market-data-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Signal the refresher thread to exit and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def interval(self):
+        """Seconds until the next pass, shorter while the market is open."""
+        return self.open_interval if is_market_open() else self.closed_interval
+
+    def refresh(self):
+        """Run one refresh pass over the full ticker universe and the indices."""
+        started = time.monotonic()
+        interval = self.interval()
+        try:
+            with self.app.app_context():
+                tickers = list(dict.fromkeys(TOP_STOCKS + self.market_service.get_watched_tickers()))
+            # keep entries alive until the pass after next, so handlers never miss between passes
+            refresh_stock_quotes(tickers, ttl=interval * 2)
+        except Exception as e:
+            print(f"Error refreshing market data: {str(e)}")
+            with self._lock:
+                self._last_error = str(e)
+            return False
+
+        # a failed index keeps its previous snapshot; the quotes pass still counts
+        failed_indices = self.market_service.refresh_indices()
+        with self._lock:
+            self._last_refresh = datetime.now()
+            self._last_refresh_at = time.monotonic()
+            self._last_duration = time.monotonic() - started
+            self._last_error = f"Index refresh failed: {', '.join(failed_indices)}" if failed_indices else None
+            self._ticker_count = len(tickers)
+        return True
+
+    def status(self):
+        """Report when the snapshot was last refreshed and whether it is stale."""
+        interval = self.interval()
+        with self._lock:
+            age = time.monotonic() - self._last_refresh_at if self._last_refresh_at is not None else None
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'market_open': is_market_open(),
+                'interval': interval,
+                'last_refresh': self._last_refresh.strftime('%Y-%m-%d %H:%M:%S') if self._last_refresh else None,
+                'age_seconds': round(age, 1) if age is not None else None,
+                'stale': age is None or age > interval * 2,
+                'last_duration': round(self._last_duration, 3) if self._last_duration is not None else None,
+                'tickers': self._ticker_count,
+                'last_error': self._last_error
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval())
@@ -0,0 +1,137 @@
+import math
+import numpy as np
+import pandas as pd
+from src.services.quote_cache import QuoteCache
+from src.services.market_providers import get_provider
+
+BENCHMARK = '^GSPC'
+ANALYTICS_WINDOWS = ('1mo', '3mo', '6mo', '1y', '2y', '5y')
+TRADING_DAYS = 252
+
+
+def load_closes(tickers, window):
+    """Daily Close prices for tickers plus the benchmark, one column per symbol."""
+    symbols = list(dict.fromkeys(list(tickers) + [BENCHMARK]))
+    frame = get_provider().download(symbols, period=window, interval='1d')
+    if frame.empty:
+        return pd.DataFrame()
+    closes = frame.xs('Close', axis=1, level=1)
+    return closes.sort_index().dropna(how='all')
+
+
+def compute_analytics(closes, tickers, rolling_days=21, with_series=False):
+    """Return/risk statistics for tickers from a Close frame that also holds the benchmark.
+
+    Everything is computed column-wise on the whole frame: simple and log
+    returns, annualized and rolling volatility, drawdowns, beta against
+    BENCHMARK and the correlation matrix of daily returns. Series, when
+    requested, are sampled at week ends to keep the payload small.
+    """
+    tickers = [ticker for ticker in tickers if ticker in closes.columns]
+    closes = closes[tickers + ([BENCHMARK] if BENCHMARK in closes.columns else [])].ffill()
+    returns = closes.pct_change(fill_method=None)
+    log_returns = np.log(closes / closes.shift(1))
+
+    first = closes.bfill().iloc[0]
+    growth = closes / first
+    cumulative = growth.iloc[-1] - 1
+    drawdown = growth / growth.cummax() - 1
+    volatility = returns.std() * math.sqrt(TRADING_DAYS)
+    rolling_volatility = returns.rolling(rolling_days, min_periods=rolling_days).std() * math.sqrt(TRADING_DAYS)
+    days = returns.count()
+    annualized = (1 + cumulative) ** (TRADING_DAYS / days.where(days > 0)) - 1
+
+    if BENCHMARK in returns.columns:
+        market = returns[BENCHMARK]
+        beta = returns.cov()[BENCHMARK] / market.var()
+    else:
+        beta = pd.Series(np.nan, index=returns.columns)
+
+    def number(value, digits=4):
+        return None if pd.isna(value) else round(float(value), digits)
+
+    stats = {}
+    for ticker in closes.columns:
+        stats[ticker] = {
+            'start_price': number(first[ticker], 2),
+            'last_price': number(closes[ticker].iloc[-1], 2),
+            'cumulative_return': number(cumulative[ticker]),
+            'log_return': number(log_returns[ticker].sum()),
+            'annualized_return': number(annualized[ticker]),
+            'volatility': number(volatility[ticker]),
+            'rolling_volatility': number(rolling_volatility[ticker].iloc[-1]),
+            'max_drawdown': number(drawdown[ticker].min()),
+            'current_drawdown': number(drawdown[ticker].iloc[-1]),
+            'beta': number(beta.get(ticker))
+        }
+
+    correlation = returns[tickers].corr()
+    result = {
+        'tickers': tickers,
+        'benchmark': BENCHMARK if BENCHMARK in closes.columns else None,
+        'start': closes.index[0].strftime('%Y-%m-%d'),
+        'end': closes.index[-1].strftime('%Y-%m-%d'),
+        'observations': len(closes),
+        'stats': stats,
+        'correlation': {
+            'tickers': tickers,
+            'matrix': [[number(value) for value in row] for row in correlation.to_numpy()]
+        }
+    }
+    if with_series:
+        weekly = lambda frame: frame.resample('W-FRI').last()
+        dates = weekly(growth).index
+        result['series'] = {
+            'dates': [day.strftime('%Y-%m-%d') for day in dates],
+            **{
+                name: {ticker: [number(value) for value in weekly(frame)[ticker]] for ticker in closes.columns}
+                for name, frame in (
+                    ('cumulative_return', growth - 1),
+                    ('drawdown', drawdown),
+                    ('rolling_volatility', rolling_volatility)
+                )
+            }
+        }
+    return result
+
+
+class PortfolioAnalytics:
+    """Caches analytics per (ticker set, window, series) so each set is computed once per TTL."""
+
+    def __init__(self, ttl=900, max_size=128, rolling_days=21):
+        self._cache = QuoteCache(ttl=ttl, max_size=max_size)
+        self.rolling_days = rolling_days
+
+    @property
+    def ttl(self):
+        return self._cache.ttl
+
+    def configure(self, ttl=None, max_size=None, rolling_days=None):
+        """Update the cache TTL (seconds), maximum entries and rolling volatility window."""
+        self._cache.configure(ttl=ttl, max_size=max_size)
+        if rolling_days is not None:
+            self.rolling_days = rolling_days
+
+    def get(self, tickers, window='6mo', with_series=False):
+        """Analytics for a set of tickers; the order given does not matter."""
+        if window not in ANALYTICS_WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(ANALYTICS_WINDOWS)}")
+        key = (tuple(sorted(set(tickers))), window, bool(with_series))
+        return self._cache.get(key, self._compute)
+
+    def stats(self):
+        """Return hit/miss counters for the analytics cache."""
+        return self._cache.stats()
+
+    def _compute(self, key):
+        tickers, window, with_series = key
+        closes = load_closes(tickers, window)
+        if closes.empty or not any(ticker in closes.columns for ticker in tickers):
+            raise LookupError(f"No price history for {', '.join(tickers)}")
+        result = compute_analytics(closes, list(tickers), self.rolling_days, with_series)
+        result['window'] = window
+        result['missing'] = [ticker for ticker in tickers if ticker not in result['tickers']]
+        return result
+
+
+portfolio_analytics = PortfolioAnalytics()
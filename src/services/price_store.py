@@ -0,0 +1,297 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+import pandas as pd
+from src.services.market_providers import MarketDataProvider, resample_bars, _PERIOD_PATTERN, _RESAMPLE_RULES
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def period_start(period, today=None):
+    """First calendar date to keep on hand for a Yahoo-style period, or None for 'max'."""
+    today = today or date.today()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return date(today.year, 1, 1)
+    match = _PERIOD_PATTERN.fullmatch(period)
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        # daily periods count trading days; leave room for weekends and holidays
+        return today - timedelta(days=count * 3 // 2 + 7)
+    offset = {
+        'wk': pd.DateOffset(weeks=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count)
+    }[unit]
+    return (pd.Timestamp(today) - offset).date()
+
+
+class PriceStore(MarketDataProvider):
+    """Daily OHLCV kept in a local SQLite file, topped up from an upstream provider.
+
+    Bars are keyed by (ticker, date). A request only goes upstream for the
+    dates the store does not cover yet: older history is backfilled once,
+    and the latest bars are re-fetched incrementally once they are older
+    than max_age seconds. Tickers needing the same range share one batched
+    upstream download, and only the tickers being fetched are locked.
+    Reads select just the requested range through the primary key, with
+    SQLite's mmap enabled.
+
+    Upstream prices are split/dividend adjusted, so a top-up starts one
+    completed bar before the last stored one: if that bar comes back with
+    a different close the history was restated, and the ticker is dropped
+    and backfilled again rather than mixing old and new adjustments.
+
+    Only daily data is stored; weekly/monthly intervals are resampled from
+    it and anything else (intraday, period='max') is passed through.
+    """
+
+    def __init__(self, upstream, db_path, max_age=60, mmap_bytes=256 * 1024 * 1024):
+        self.upstream = upstream
+        self.db_path = db_path
+        self.max_age = max_age
+        self.mmap_bytes = mmap_bytes
+        self._locks = {}  # ticker -> lock held while that ticker is fetched
+        self._locks_lock = threading.Lock()
+        self._counters = {'reads': 0, 'upstream_calls': 0, 'bars_fetched': 0, 'passthrough': 0, 'restated': 0}
+        self._counters_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS price_bar ('
+                'ticker TEXT NOT NULL, date TEXT NOT NULL, open REAL, high REAL, low REAL, close REAL, volume REAL, '
+                'PRIMARY KEY (ticker, date)) WITHOUT ROWID'
+            )
+            # start_date: earliest date requested so far; last_fetched: unix time of the last top-up
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS price_coverage ('
+                'ticker TEXT PRIMARY KEY, start_date TEXT NOT NULL, last_date TEXT, last_fetched REAL NOT NULL)'
+            )
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        frame = self.download([ticker], period=period, interval=interval)
+        if ticker not in frame.columns.get_level_values(0):
+            return pd.DataFrame(columns=FIELDS)
+        return frame[ticker].dropna(how='all')
+
+    def download(self, tickers, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        tickers = list(dict.fromkeys(tickers))
+        if (interval != '1d' and interval not in _RESAMPLE_RULES) or (start is None and period == 'max'):
+            self._count('passthrough')
+            return self.upstream.download(tickers, period=period, interval=interval, start=start, end=end, **kwargs)
+
+        first = pd.Timestamp(start).date() if start is not None else period_start(period)
+        self._sync(tickers, first, kwargs)
+        frames = self._read(tickers, first, pd.Timestamp(end).date() if end is not None else None)
+
+        trading_days = None
+        if start is None:
+            match = _PERIOD_PATTERN.fullmatch(period)
+            if match and match.group(2) == 'd':
+                trading_days = int(match.group(1))
+        result = {}
+        for ticker, bars in frames.items():
+            if trading_days:
+                bars = bars.iloc[-trading_days:]
+            bars = resample_bars(bars, interval)
+            if not bars.empty:
+                result[ticker] = bars
+        if not result:
+            return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['Ticker', 'Price']))
+        return pd.concat(result, axis=1).sort_index()
+
+    def info(self, symbol):
+        return self.upstream.info(symbol)
+
+    def stats(self):
+        """Return read/upstream counters and how much is stored."""
+        with self._connect() as connection:
+            bars, tickers = connection.execute('SELECT COUNT(*), COUNT(DISTINCT ticker) FROM price_bar').fetchone()
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats.update({'bars': bars, 'tickers': tickers, 'max_age': self.max_age, 'path': self.db_path})
+        return stats
+
+    def _sync(self, tickers, first, kwargs):
+        """Fetch whatever part of [first, today] the store is missing, batched by range."""
+        # coverage is checked unlocked so fresh tickers never wait on someone else's download
+        plans = self._plans(tickers, first)
+        if not plans:
+            return
+        pending = sorted({ticker for group in plans.values() for ticker in group})
+        locks = self._ticker_locks(pending)
+        for lock in locks:  # sorted, so overlapping requests cannot deadlock
+            lock.acquire()
+        try:
+            # plan again: another request may have fetched these while we waited
+            for (start, end), group in self._plans(pending, first).items():
+                self._fetch(group, start, end, kwargs)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _plans(self, tickers, first):
+        """Upstream ranges still needed for tickers, as {(start, end): tickers}."""
+        today = date.today()
+        with self._connect() as connection:
+            placeholders = ','.join('?' * len(tickers))
+            coverage = {
+                ticker: (start_date, last_date, prior_date, last_fetched)
+                for ticker, start_date, last_date, prior_date, last_fetched in connection.execute(
+                    f'SELECT ticker, start_date, last_date, '
+                    f'(SELECT MAX(date) FROM price_bar WHERE ticker = c.ticker AND date < c.last_date), '
+                    f'last_fetched FROM price_coverage c WHERE ticker IN ({placeholders})', tickers
+                )
+            }
+
+        plans = {}
+        for ticker in tickers:
+            if ticker not in coverage:
+                plans.setdefault((first, None), []).append(ticker)
+                continue
+            start_date, last_date, prior_date, last_fetched = coverage[ticker]
+            start_date = date.fromisoformat(start_date)
+            if first is not None and first < start_date:
+                plans.setdefault((first, start_date), []).append(ticker)
+            if time.time() - last_fetched > self.max_age:
+                # the last stored bar may be a partial day; overlap the one before it
+                top_up = date.fromisoformat(prior_date or last_date or start_date.isoformat())
+                plans.setdefault((min(top_up, today), None), []).append(ticker)
+        return plans
+
+    def _ticker_locks(self, tickers):
+        with self._locks_lock:
+            return [self._locks.setdefault(ticker, threading.Lock()) for ticker in tickers]
+
+    def _fetch(self, tickers, start, end, kwargs):
+        try:
+            frame = self.upstream.download(
+                tickers, interval='1d', start=start.isoformat(),
+                end=end.isoformat() if end is not None else None, **kwargs
+            )
+        except Exception as e:
+            # serve what is stored; the next request retries
+            print(f"Error fetching prices for {', '.join(tickers)} from {start}: {str(e)}")
+            return
+        self._count('upstream_calls')
+
+        rows = []
+        present = set(frame.columns.get_level_values(0)) if not frame.empty else set()
+        for ticker in tickers:
+            if ticker not in present:
+                continue
+            bars = frame[ticker].dropna(how='all')
+            rows.extend(
+                (ticker, day.strftime('%Y-%m-%d'), *(None if pd.isna(value) else float(value) for value in values))
+                for day, values in zip(bars.index, bars.reindex(columns=FIELDS).itertuples(index=False))
+            )
+        self._count('bars_fetched', len(rows))
+
+        restated = self._restated(tickers, rows)
+        if restated:
+            rows = [row for row in rows if row[0] not in restated]
+            tickers = [ticker for ticker in tickers if ticker not in restated]
+
+        with self._connect() as connection:
+            connection.executemany('INSERT OR REPLACE INTO price_bar VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            for ticker in tickers:
+                connection.execute(
+                    'INSERT INTO price_coverage (ticker, start_date, last_date, last_fetched) '
+                    'VALUES (?, ?, (SELECT MAX(date) FROM price_bar WHERE ticker = ?), ?) '
+                    'ON CONFLICT(ticker) DO UPDATE SET '
+                    'start_date = MIN(start_date, excluded.start_date), '
+                    'last_date = excluded.last_date, '
+                    'last_fetched = CASE WHEN ? THEN excluded.last_fetched ELSE last_fetched END',
+                    (ticker, start.isoformat(), ticker, time.time(), end is None)
+                )
+        if restated:
+            self._backfill(restated, kwargs)
+
+    def _restated(self, tickers, rows):
+        """Tickers whose fetched closes differ from stored completed bars (a new split or dividend).
+
+        The last stored bar of each ticker is left out of the comparison
+        since it may have been stored mid-session.
+        """
+        if not rows:
+            return {}
+        placeholders = ','.join('?' * len(tickers))
+        with self._connect() as connection:
+            stored = {
+                (ticker, day): close
+                for ticker, day, close in connection.execute(
+                    f'SELECT ticker, date, close FROM price_bar p WHERE ticker IN ({placeholders}) '
+                    f'AND date >= ? AND date < (SELECT MAX(date) FROM price_bar WHERE ticker = p.ticker)',
+                    [*tickers, min(row[1] for row in rows)]
+                )
+            }
+        restated = {}
+        for ticker, day, _, _, _, close, _ in rows:
+            previous = stored.get((ticker, day))
+            if previous is None or close is None or ticker in restated:
+                continue
+            if not math.isclose(previous, close, rel_tol=1e-4):
+                restated[ticker] = day
+        return restated
+
+    def _backfill(self, restated, kwargs):
+        """Drop restated tickers and fetch them again from the start of their coverage."""
+        placeholders = ','.join('?' * len(restated))
+        with self._connect() as connection:
+            starts = dict(connection.execute(
+                f'SELECT ticker, start_date FROM price_coverage WHERE ticker IN ({placeholders})', list(restated)
+            ))
+            connection.execute(f'DELETE FROM price_bar WHERE ticker IN ({placeholders})', list(restated))
+            connection.execute(f'DELETE FROM price_coverage WHERE ticker IN ({placeholders})', list(restated))
+        self._count('restated', len(restated))
+        groups = {}
+        for ticker, day in restated.items():
+            groups.setdefault(starts.get(ticker, day), []).append(ticker)
+        for start, group in groups.items():
+            self._fetch(group, date.fromisoformat(start), None, kwargs)
+
+    def _read(self, tickers, first, last):
+        self._count('reads')
+        placeholders = ','.join('?' * len(tickers))
+        query = f'SELECT ticker, date, open, high, low, close, volume FROM price_bar WHERE ticker IN ({placeholders})'
+        params = list(tickers)
+        if first is not None:
+            query += ' AND date >= ?'
+            params.append(first.isoformat())
+        if last is not None:
+            query += ' AND date <= ?'
+            params.append(last.isoformat())
+        with self._connect() as connection:
+            rows = pd.read_sql_query(query + ' ORDER BY ticker, date', connection, params=params)
+
+        frames = {}
+        rows['date'] = pd.to_datetime(rows['date'])
+        for ticker, bars in rows.groupby('ticker', sort=False):
+            bars = bars.drop(columns='ticker').set_index('date')
+            bars.index.name = 'Date'
+            bars.columns = FIELDS
+            frames[ticker] = bars
+        return frames
+
+    def _count(self, name, amount=1):
+        with self._counters_lock:
+            self._counters[name] += amount
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            connection.execute(f'PRAGMA mmap_size={int(self.mmap_bytes)}')
+            with connection:
+                yield connection
+        finally:
+            connection.close()
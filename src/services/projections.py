@@ -0,0 +1,109 @@
+import math
+import numpy as np
+
+MAX_SCENARIOS = 10000
+MAX_YEARS = 50
+MAX_PATH_POINTS = 500000
+
+
+def _scenario_arrays(monthly_investment, expected_return, years, step_up=0.0):
+    amounts, rates, years, step_ups = np.broadcast_arrays(
+        np.asarray(monthly_investment, dtype=float),
+        np.asarray(expected_return, dtype=float),
+        np.asarray(years, dtype=int),
+        np.asarray(step_up, dtype=float)
+    )
+    return amounts.ravel(), rates.ravel(), years.ravel(), step_ups.ravel()
+
+
+def project_sip(monthly_investment, expected_return, years, step_up=0.0, with_paths=False):
+    """Project many SIP scenarios at once with the annuity-due recursion.
+
+    Arguments broadcast against each other, one element per scenario:
+    monthly_investment, expected_return (% a year), years and step_up
+    (% increase of the contribution every 12 months). Each month
+    balance = (balance + contribution) * (1 + rate / 1200), which is the
+    FV = P * ((1 + r)^n - 1) / r * (1 + r) formula when step_up is 0.
+
+    Returns a dict of 1-D arrays (total_investment, final_amount,
+    total_returns) and, with with_paths, 'paths' of shape
+    (scenarios, max_months + 1) holding the balance after each month;
+    a scenario's balance stays flat once its own term has ended.
+    """
+    amounts, rates, years, step_ups = _scenario_arrays(monthly_investment, expected_return, years, step_up)
+    months = years * 12
+    horizon = int(months.max()) if months.size else 0
+    growth = 1 + rates / 1200
+    step = 1 + step_ups / 100
+
+    balance = np.zeros(amounts.shape)
+    invested = np.zeros(amounts.shape)
+    contribution = amounts.copy()
+    paths = np.empty((amounts.size, horizon + 1)) if with_paths else None
+    if with_paths:
+        paths[:, 0] = 0.0
+
+    for month in range(horizon):
+        if month and month % 12 == 0:
+            contribution = contribution * step
+        active = month < months
+        deposit = np.where(active, contribution, 0.0)
+        balance = np.where(active, (balance + deposit) * growth, balance)
+        invested += deposit
+        if with_paths:
+            paths[:, month + 1] = balance
+
+    result = {
+        'total_investment': invested,
+        'final_amount': balance,
+        'total_returns': balance - invested
+    }
+    if with_paths:
+        result['paths'] = paths
+    return result
+
+
+def required_monthly_investment(target_amount, current_amount, expected_return, months, step_up=0.0):
+    """Starting monthly SIP needed to grow current_amount to target_amount in months.
+
+    Vectorized like project_sip; the current corpus compounds monthly and
+    the contribution steps up every 12 months. Zero where the current
+    corpus alone already reaches the target.
+    """
+    target, current, rates, months, step_ups = np.broadcast_arrays(
+        np.asarray(target_amount, dtype=float),
+        np.asarray(current_amount, dtype=float),
+        np.asarray(expected_return, dtype=float),
+        np.asarray(months, dtype=int),
+        np.asarray(step_up, dtype=float)
+    )
+    growth = 1 + rates / 1200
+    grown_corpus = current * growth ** months
+
+    # Future value of contributing 1 a month (stepping up) for each term
+    unit = np.zeros(target.shape, dtype=float)
+    contribution = np.ones(target.shape, dtype=float)
+    for month in range(int(months.max()) if months.size else 0):
+        if month and month % 12 == 0:
+            contribution = contribution * (1 + step_ups / 100)
+        active = month < months
+        unit = np.where(active, (unit + contribution) * growth, unit)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        needed = np.where(unit > 0, (target - grown_corpus) / unit, np.inf)
+    return np.maximum(needed, 0.0)
+
+
+def sip_grid(monthly_investment, expected_return, years, step_up=(0.0,), max_scenarios=MAX_SCENARIOS):
+    """Cartesian product of the given values as flat scenario arrays, plus the grid shape.
+
+    Raises ValueError before allocating anything when the product would
+    exceed max_scenarios.
+    """
+    axes = [np.asarray(values, dtype=float).ravel() for values in (monthly_investment, expected_return, years, step_up)]
+    size = math.prod(axis.size for axis in axes)
+    if size > max_scenarios:
+        raise ValueError(f'The grid has {size} scenarios, at most {max_scenarios} are allowed per request')
+    mesh = np.meshgrid(*axes, indexing='ij')
+    shape = mesh[0].shape
+    return [axis.ravel() for axis in mesh], shape
@@ -0,0 +1,172 @@
+import math
+import threading
+
+CHARS_PER_TOKEN = 4
+OMITTED_RESERVE = 8
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini-style tokenizers (about 4 characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class PromptBuilder:
+    """Renders a FinancialContext into a compact prompt within a token budget.
+
+    Expenses are summarized as per-month/category totals plus the most
+    recent items, so prompt size no longer grows with history length.
+    Sections are filled in priority order and truncated with an
+    "omitted" note once the context budget is spent.
+    """
+
+    def __init__(self, context_tokens=1500, max_query_tokens=500, recent_items=20, history_tokens=800):
+        self.context_tokens = context_tokens
+        self.history_tokens = history_tokens
+        self.max_query_tokens = max_query_tokens
+        self.recent_items = recent_items
+        self._lock = threading.Lock()
+        self._prompts = 0
+        self._total_tokens = 0
+        self._max_tokens = 0
+        self._last_tokens = 0
+        self._truncated = 0
+
+    def configure(self, context_tokens=None, max_query_tokens=None, recent_items=None, history_tokens=None):
+        """Update the context and history token budgets, query cap and recent-item count."""
+        with self._lock:
+            if context_tokens is not None:
+                self.context_tokens = context_tokens
+            if history_tokens is not None:
+                self.history_tokens = history_tokens
+            if max_query_tokens is not None:
+                self.max_query_tokens = max_query_tokens
+            if recent_items is not None:
+                self.recent_items = recent_items
+
+    def render_context(self, context):
+        """Render the user's data sections, spending at most context_tokens."""
+        summary = context.summary
+        lines = [
+            "User's Financial Summary (Last 6 months):",
+            f"- Total Expenses: ₹{summary['total_expenses_6m']:.2f}",
+            f"- Total Budgeted: ₹{summary['total_budget_6m']:.2f}",
+            f"- Number of Expenses: {summary['expense_count']}",
+            f"- Active Goals: {summary['active_goals']}"
+        ]
+        remaining = self.context_tokens - estimate_tokens('\n'.join(lines))
+        truncated = False
+
+        sections = [
+            (
+                'Financial Goals',
+                [
+                    f"- {goal['name']}: ₹{goal['current_amount'] or 0:.2f} of ₹{goal['target_amount']:.2f} by {goal['target_date']}"
+                    for goal in context.goals
+                ],
+                'No goals set'
+            ),
+            (
+                'Budget Information',
+                [f"- {budget['month']} {budget['category']}: ₹{budget['amount']:.2f}" for budget in context.budgets],
+                'No budget set'
+            ),
+            (
+                'Monthly Spending by Category',
+                [
+                    f"- {row['month']} {row['category']}: ₹{row['total']:.2f} ({row['count']} expenses)"
+                    for row in context.monthly_spend
+                ],
+                'No recent expenses'
+            ),
+            (
+                'Recent Expenses',
+                [
+                    f"- {expense['date']} {expense['category']}: ₹{expense['amount']:.2f}"
+                    + (f" ({expense['description']})" if expense['description'] else '')
+                    for expense in context.recent_expenses[:self.recent_items]
+                ],
+                'No recent expenses'
+            )
+        ]
+        for section_index, (title, items, empty) in enumerate(sections):
+            header = f"\n{title}:" if items else f"\n{title}: {empty}"
+            remaining -= estimate_tokens(header) + 1
+            lines.append(header)
+            for index, item in enumerate(items):
+                cost = estimate_tokens(item) + 1
+                # keep room for this section's omitted note and the later headers
+                if cost + OMITTED_RESERVE * (len(sections) - section_index) > remaining:
+                    lines.append(f"- (+{len(items) - index} more omitted)")
+                    remaining -= estimate_tokens(lines[-1]) + 1
+                    truncated = True
+                    break
+                lines.append(item)
+                remaining -= cost
+
+        if truncated:
+            with self._lock:
+                self._truncated += 1
+        return '\n'.join(lines)
+
+    def render_history(self, summary, turns):
+        """Render the conversation summary and the newest turns within history_tokens.
+
+        The summary gets at most half the budget; turns are taken newest
+        first until the rest is spent and each is clipped to fit.
+        """
+        lines = []
+        remaining = self.history_tokens
+        if summary:
+            summary = summary[:self.history_tokens // 2 * CHARS_PER_TOKEN]
+            lines.append(f"Earlier in this conversation: {summary}")
+            remaining -= estimate_tokens(lines[0])
+
+        recent = []
+        for role, content in reversed(turns):
+            if remaining <= OMITTED_RESERVE:
+                break
+            speaker = 'User' if role == 'user' else 'Assistant'
+            line = f"{speaker}: {content[:(remaining - 1) * CHARS_PER_TOKEN]}"
+            recent.append(line)
+            remaining -= estimate_tokens(line) + 1
+        if recent:
+            lines.append('Recent messages:\n' + '\n'.join(reversed(recent)))
+        return '\n\n'.join(lines)
+
+    def build(self, instructions, context, query=None, history=None):
+        """Assemble instructions, the rendered context, conversation history and an optional user query."""
+        parts = [instructions.strip(), context.prompt_context]
+        if history:
+            rendered = self.render_history(*history)
+            if rendered:
+                parts.append(rendered)
+        if query is not None:
+            query_limit = self.max_query_tokens * CHARS_PER_TOKEN
+            parts.append(f"User Query: {query[:query_limit]}")
+        prompt = '\n\n'.join(parts)
+
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self._prompts += 1
+            self._total_tokens += tokens
+            self._last_tokens = tokens
+            self._max_tokens = max(self._max_tokens, tokens)
+        return prompt
+
+    def stats(self):
+        """Return prompt size metrics (estimated tokens)."""
+        with self._lock:
+            return {
+                'prompts': self._prompts,
+                'last_tokens': self._last_tokens,
+                'avg_tokens': round(self._total_tokens / self._prompts, 1) if self._prompts else 0,
+                'max_tokens': self._max_tokens,
+                'truncated_contexts': self._truncated,
+                'context_budget': self.context_tokens,
+                'max_query_tokens': self.max_query_tokens,
+                'recent_items': self.recent_items,
+                'history_budget': self.history_tokens
+            }
+
+
+prompt_builder = PromptBuilder()
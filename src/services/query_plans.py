@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, or_, select, text
+from src.models import db, Budget, Expense, Goal, MonthlySpend
+
+
+def hot_queries(user_id=1):
+    """The per-user queries behind the expense, budget, goal and advice routes."""
+    now = datetime.now()
+    month_start = date(now.year, now.month, 1)
+    return {
+        'expenses_list': select(Expense)
+            .where(Expense.user_id == user_id)
+            .order_by(Expense.date.desc()),
+        'expenses_keyset_page': select(Expense)
+            .where(Expense.user_id == user_id, or_(
+                Expense.date < now,
+                and_(Expense.date == now, Expense.id < 1000)
+            ))
+            .order_by(Expense.date.desc(), Expense.id.desc())
+            .limit(51),
+        'expenses_last_6_months': select(Expense)
+            .where(Expense.user_id == user_id, Expense.date >= now - timedelta(days=180))
+            .order_by(Expense.date.desc()),
+        'expenses_window_sum': select(func.sum(Expense.amount))
+            .where(Expense.user_id == user_id, Expense.date.between(now - timedelta(days=30), now)),
+        'expenses_window_by_category': select(Expense.category, func.sum(Expense.amount))
+            .where(Expense.user_id == user_id, Expense.date.between(now - timedelta(days=30), now))
+            .group_by(Expense.category),
+        'expenses_category_window': select(func.sum(Expense.amount))
+            .where(Expense.user_id == user_id, Expense.category == 'Food', Expense.date >= month_start),
+        'budgets_since': select(Budget)
+            .where(Budget.user_id == user_id, Budget.month >= month_start - timedelta(days=180)),
+        'budget_alerts': select(Budget.category, Budget.amount, func.coalesce(MonthlySpend.total, 0.0))
+            .outerjoin(MonthlySpend, and_(
+                MonthlySpend.user_id == Budget.user_id,
+                MonthlySpend.category == Budget.category,
+                MonthlySpend.month == month_start
+            ))
+            .where(Budget.user_id == user_id),
+        'context_monthly_spend': select(Expense.category, func.sum(Expense.amount), func.count(Expense.id))
+            .where(Expense.user_id == user_id, Expense.date >= now - timedelta(days=180))
+            .group_by(Expense.category),
+        'context_recent_expenses': select(Expense)
+            .where(Expense.user_id == user_id, Expense.date >= now - timedelta(days=180))
+            .order_by(Expense.date.desc(), Expense.id.desc())
+            .limit(20),
+        'goals': select(Goal).where(Goal.user_id == user_id),
+        'rollup_months': select(MonthlySpend.month, func.sum(MonthlySpend.total))
+            .where(MonthlySpend.user_id == user_id, MonthlySpend.month >= month_start - timedelta(days=365))
+            .group_by(MonthlySpend.month),
+    }
+
+
+def explain(statement):
+    """Return the database's query plan for a statement as a list of lines."""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+    return [row[0] for row in rows]
+
+
+def table_scans(plan, dialect_name):
+    """Lines of a plan that read a whole table instead of using an index."""
+    if dialect_name == 'sqlite':
+        return [line for line in plan if line.startswith('SCAN ') and ' USING ' not in line]
+    return [line for line in plan if 'Seq Scan' in line]
+
+
+def check_query_plans(user_id=1):
+    """EXPLAIN every hot query; returns {name: (plan, table_scan_lines)}."""
+    dialect_name = db.session.get_bind().dialect.name
+    results = {}
+    try:
+        if dialect_name == 'postgresql':
+            # small tables make a seq scan cheapest; ask whether an index path exists
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        for name, statement in hot_queries(user_id).items():
+            plan = explain(statement)
+            results[name] = (plan, table_scans(plan, dialect_name))
+    finally:
+        db.session.rollback()
+    return results
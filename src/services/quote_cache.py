@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _PendingFetch:
+    """A single upstream fetch that concurrent callers wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QuoteCache:
+    """Process-wide TTL + LRU cache for per-ticker market quotes.
+
+    Concurrent misses for the same key share one upstream fetch, and an
+    expired entry is served if refreshing it fails.
+    """
+
+    def __init__(self, ttl=60, max_size=512):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._coalesced = 0
+
+    def configure(self, ttl=None, max_size=None):
+        """Update TTL (seconds) and maximum number of entries."""
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_size is not None:
+                self.max_size = max_size
+                self._evict()
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader(key) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+
+            if entry is not None:
+                self._stale += 1
+            else:
+                self._misses += 1
+
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingFetch()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = loader(key)
+        except Exception as e:
+            if entry is not None:
+                print(f"Serving stale quote for {key}: {str(e)}")
+                pending.value = entry[0]
+            else:
+                pending.error = e
+        else:
+            pending.value = value
+            self.set(key, value)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.event.set()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.value
+
+    def get_many(self, keys, loader, default=None):
+        """Return {key: value} for keys, loading every miss with one loader(keys) call.
+
+        The loader returns a dict; keys it leaves out (or all keys, if it
+        raises) fall back to a stale entry when one exists, else to default.
+        """
+        results = {}
+        to_load = []
+        waiting = {}
+        with self._lock:
+            now = time.monotonic()
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._hits += 1
+                    self._entries.move_to_end(key)
+                    results[key] = entry[0]
+                    continue
+
+                if entry is not None:
+                    self._stale += 1
+                else:
+                    self._misses += 1
+
+                pending = self._pending.get(key)
+                if pending is not None:
+                    self._coalesced += 1
+                    waiting[key] = pending
+                else:
+                    pending = self._pending[key] = _PendingFetch()
+                    to_load.append((key, entry, pending))
+
+        if to_load:
+            try:
+                loaded = loader([key for key, _, _ in to_load])
+            except Exception as e:
+                print(f"Error fetching quotes for {len(to_load)} tickers: {str(e)}")
+                loaded = {}
+            for key, entry, pending in to_load:
+                if key in loaded:
+                    pending.value = loaded[key]
+                    self.set(key, loaded[key])
+                elif entry is not None:
+                    pending.value = entry[0]
+                else:
+                    pending.error = KeyError(key)
+                with self._lock:
+                    self._pending.pop(key, None)
+                pending.event.set()
+                results[key] = default if pending.error is not None else pending.value
+
+        for key, pending in waiting.items():
+            pending.event.wait()
+            results[key] = default if pending.error is not None else pending.value
+
+        return results
+
+    def peek(self, key):
+        """Return a fresh cached value without loading or counting, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, optionally overriding the default TTL."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss/stale counters and current occupancy."""
+        with self._lock:
+            lookups = self._hits + self._misses + self._stale
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'stale': self._stale,
+                'coalesced': self._coalesced,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl
+            }
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+quote_cache = QuoteCache()
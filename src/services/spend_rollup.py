@@ -0,0 +1,181 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, extract, func
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models import db, Expense, MonthlySpend
+
+
+def month_start(value):
+    """First day of the month containing a date or datetime."""
+    return date(value.year, value.month, 1)
+
+
+class SpendRollupService:
+    """Maintains and reads the MonthlySpend rollup of expenses.
+
+    Writers call record_* inside the same transaction as the Expense change
+    and commit as usual; readers get O(months x categories) rows instead of
+    scanning every expense.
+    """
+
+    @staticmethod
+    def apply(user_id, category, expense_date, amount, count):
+        """Add amount/count to one (user, category, month) bucket."""
+        values = {
+            'user_id': user_id,
+            'category': category,
+            'month': month_start(expense_date),
+            'total': amount,
+            'count': count
+        }
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            stmt = insert(MonthlySpend).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'category', 'month'],
+                set_={
+                    'total': MonthlySpend.total + stmt.excluded.total,
+                    'count': MonthlySpend.count + stmt.excluded.count
+                }
+            )
+            db.session.execute(stmt)
+            return
+
+        row = MonthlySpend.query.filter_by(
+            user_id=user_id, category=category, month=values['month']
+        ).with_for_update().first()
+        if row is None:
+            db.session.add(MonthlySpend(**values))
+        else:
+            row.total += amount
+            row.count += count
+
+    @staticmethod
+    def record_added(expense):
+        SpendRollupService.apply(expense.user_id, expense.category, expense.date, expense.amount, 1)
+
+    @staticmethod
+    def record_removed(expense):
+        SpendRollupService.apply(expense.user_id, expense.category, expense.date, -expense.amount, -1)
+
+    @staticmethod
+    def record_changed(user_id, old_category, old_date, old_amount, expense):
+        """Move an edited expense from its old bucket to its new one."""
+        SpendRollupService.apply(user_id, old_category, old_date, -old_amount, -1)
+        SpendRollupService.record_added(expense)
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """Recompute the rollup from raw expenses for one user, or everyone."""
+        year = extract('year', Expense.date)
+        month = extract('month', Expense.date)
+        query = db.session.query(
+            Expense.user_id, Expense.category, year, month,
+            func.sum(Expense.amount), func.count(Expense.id)
+        ).group_by(Expense.user_id, Expense.category, year, month)
+
+        delete = MonthlySpend.query
+        if user_id is not None:
+            query = query.filter(Expense.user_id == user_id)
+            delete = delete.filter_by(user_id=user_id)
+        delete.delete(synchronize_session=False)
+
+        rows = [
+            {
+                'user_id': row_user_id,
+                'category': category,
+                'month': date(int(row_year), int(row_month), 1),
+                'total': total,
+                'count': count
+            }
+            for row_user_id, category, row_year, row_month, total, count in query.all()
+        ]
+        if rows:
+            db.session.execute(MonthlySpend.__table__.insert(), rows)
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def category_totals(user_id, start_month=None, end_month=None):
+        """Get {category: total} over whole months in [start_month, end_month]."""
+        query = db.session.query(MonthlySpend.category, func.sum(MonthlySpend.total), func.sum(MonthlySpend.count))\
+            .filter(MonthlySpend.user_id == user_id)
+        if start_month is not None:
+            query = query.filter(MonthlySpend.month >= month_start(start_month))
+        if end_month is not None:
+            query = query.filter(MonthlySpend.month <= month_start(end_month))
+        totals = query.group_by(MonthlySpend.category).order_by(MonthlySpend.category).all()
+        return {category: total for category, total, count in totals if count}
+
+    @staticmethod
+    def month_totals(user_id, category=None, start_month=None, end_month=None):
+        """Get {month: total} for whole months, optionally for one category."""
+        query = db.session.query(MonthlySpend.month, func.sum(MonthlySpend.total))\
+            .filter(MonthlySpend.user_id == user_id)
+        if category is not None:
+            query = query.filter(MonthlySpend.category == category)
+        if start_month is not None:
+            query = query.filter(MonthlySpend.month >= month_start(start_month))
+        if end_month is not None:
+            query = query.filter(MonthlySpend.month <= month_start(end_month))
+        return dict(query.group_by(MonthlySpend.month).all())
+
+    @staticmethod
+    def window_parts(start_date, end_date):
+        """Split [start_date, end_date] into whole rollup months and raw edge ranges.
+
+        Returns (first_whole_month, last_whole_month, edges); the whole-month
+        range may be empty (first > last) for windows shorter than two months.
+        """
+        first_month = month_start(start_date)
+        last_month = month_start(end_date)
+        next_month = (first_month + timedelta(days=32)).replace(day=1)
+        first_month_end = datetime.combine(next_month, datetime.min.time()) - timedelta(microseconds=1)
+        edges = [(start_date, min(end_date, first_month_end))]
+        if last_month != first_month:
+            edges.append((max(start_date, datetime.combine(last_month, datetime.min.time())), end_date))
+        return next_month, last_month - timedelta(days=1), edges
+
+    @staticmethod
+    def category_totals_between(user_id, start_date, end_date):
+        """Get {category: total} of expenses dated in [start_date, end_date], exactly."""
+        first_whole, last_whole, edges = SpendRollupService.window_parts(start_date, end_date)
+        categories = {}
+        if first_whole <= last_whole:
+            categories.update(SpendRollupService.category_totals(user_id, first_whole, last_whole))
+        for edge_start, edge_end in edges:
+            totals = db.session.query(Expense.category, func.sum(Expense.amount)).filter(and_(
+                Expense.user_id == user_id,
+                Expense.date.between(edge_start, edge_end)
+            )).group_by(Expense.category).all()
+            for category, total in totals:
+                categories[category] = categories.get(category, 0) + total
+        return categories
+
+    @staticmethod
+    def monthly_trend(user_id, start_date, end_date):
+        """Get {'YYYY-MM': total} of expenses dated in [start_date, end_date].
+
+        Whole months inside the window come from the rollup; the two partial
+        edge months are summed from raw expenses so the result is exact.
+        """
+        monthly_data = {}
+        current = start_date
+        while current <= end_date:
+            monthly_data[current.strftime('%Y-%m')] = 0
+            current = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+        first_whole, last_whole, edges = SpendRollupService.window_parts(start_date, end_date)
+        if first_whole <= last_whole:
+            inner = SpendRollupService.month_totals(user_id, start_month=first_whole, end_month=last_whole)
+            for month, total in inner.items():
+                monthly_data[month.strftime('%Y-%m')] = total or 0
+
+        for edge_start, edge_end in edges:
+            total = db.session.query(func.sum(Expense.amount)).filter(and_(
+                Expense.user_id == user_id,
+                Expense.date.between(edge_start, edge_end)
+            )).scalar()
+            monthly_data[edge_start.strftime('%Y-%m')] = total or 0
+
+        return monthly_data
@@ -273,6 +273,41 @@ function addExpense(form) {
     return false;
 }
 
+// Bulk import a bank statement
+function importStatement(form) {
+    const result = document.getElementById('import-result');
+    result.textContent = 'Importing...';
+
+    fetch('/finance/expenses/import', {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': document.querySelector('meta[name="csrf-token"]').content
+        },
+        body: new FormData(form)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            result.textContent = data.error;
+            return;
+        }
+        let summary = `Imported ${data.imported}, skipped ${data.duplicates} duplicates`;
+        if (data.error_count) {
+            const rows = data.errors.map(e => `row ${e.row}: ${e.error}`).join('; ');
+            summary += `, ${data.error_count} errors (${rows})`;
+        }
+        result.textContent = summary;
+        if (data.imported) {
+            setTimeout(() => location.reload(), 1500);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        result.textContent = 'Import failed';
+    });
+    return false;
+}
+
 function editGoal(id, name, targetAmount, currentAmount, targetDate) {
     // Update form for editing
     const form = document.getElementById('goalForm');
@@ -419,8 +454,94 @@ function deleteExpense(id) {
     .catch(error => console.error('Error:', error));
 }
 
+// Build one expense table row with the same layout as the server-rendered rows
+function buildExpenseRow(expense) {
+    const row = document.createElement('tr');
+    
+    const dateCell = document.createElement('td');
+    dateCell.textContent = expense.date;
+    
+    const categoryCell = document.createElement('td');
+    const badge = document.createElement('span');
+    badge.className = 'badge bg-secondary';
+    badge.textContent = expense.category;
+    categoryCell.appendChild(badge);
+    
+    const amountCell = document.createElement('td');
+    amountCell.textContent = `₹${Number(expense.amount).toFixed(2)}`;
+    
+    const descriptionCell = document.createElement('td');
+    descriptionCell.textContent = expense.description || '';
+    
+    const actionsCell = document.createElement('td');
+    const group = document.createElement('div');
+    group.className = 'btn-group btn-group-sm';
+    const editBtn = document.createElement('button');
+    editBtn.className = 'btn btn-outline-primary';
+    editBtn.innerHTML = '<i class="bi bi-pencil"></i>';
+    editBtn.addEventListener('click', () => editExpense(expense.id, expense.category, expense.amount, expense.description || '', expense.date));
+    const deleteBtn = document.createElement('button');
+    deleteBtn.className = 'btn btn-outline-danger';
+    deleteBtn.innerHTML = '<i class="bi bi-trash"></i>';
+    deleteBtn.addEventListener('click', () => deleteExpense(expense.id));
+    group.append(editBtn, deleteBtn);
+    actionsCell.appendChild(group);
+    
+    row.append(dateCell, categoryCell, amountCell, descriptionCell, actionsCell);
+    return row;
+}
+
+// Lazily load further pages of expenses as the user scrolls to the end of the table
+function initExpensePaging() {
+    const sentinel = document.getElementById('expenses-sentinel');
+    const tbody = document.getElementById('expense-rows');
+    if (!sentinel || !tbody) {
+        return;
+    }
+    
+    let loading = false;
+    const observer = new IntersectionObserver(entries => {
+        if (!entries.some(entry => entry.isIntersecting) || loading) {
+            return;
+        }
+        const cursor = sentinel.dataset.nextCursor;
+        if (!cursor) {
+            observer.disconnect();
+            sentinel.remove();
+            return;
+        }
+        
+        loading = true;
+        fetch(`/finance/expenses/list?cursor=${encodeURIComponent(cursor)}`)
+            .then(response => response.json())
+            .then(data => {
+                (data.expenses || []).forEach(expense => tbody.appendChild(buildExpenseRow(expense)));
+                sentinel.dataset.nextCursor = data.next_cursor || '';
+                if (!data.next_cursor) {
+                    observer.disconnect();
+                    sentinel.remove();
+                } else {
+                    // re-observe so a sentinel that is still on screen triggers the next page
+                    observer.unobserve(sentinel);
+                    observer.observe(sentinel);
+                }
+            })
+            .catch(error => {
+                console.error('Error loading expenses:', error);
+                sentinel.textContent = 'Could not load more expenses';
+                observer.disconnect();
+            })
+            .finally(() => {
+                loading = false;
+            });
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+}
+
 // Load expense chart on page load
 window.addEventListener('load', function() {
+    initExpensePaging();
+    
     // Set default date to today
     const today = new Date().toISOString().split('T')[0];
     const dateInput = document.getElementById('date');
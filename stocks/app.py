@@ -1,5 +1,5 @@
 from flask import Flask, request, jsonify, render_template, redirect, url_for, flash
-from utils import fetch_stock_info, fetch_top_stocks, plot_stocks
+from utils import fetch_stock_info, fetch_stock_quotes, fetch_top_stocks, plot_stocks
 
 
 
@@ -15,10 +15,8 @@ def top_stocks():
 
 @app.route('/my-watchlist')
 def my_watchlist():
-    stocks_data = []
     plot_url = ''
-    for ticker in stock_watchlist:
-        stocks_data.append(fetch_stock_info(ticker))
+    stocks_data = fetch_stock_quotes(stock_watchlist)
     if len(stock_watchlist) > 0:
         plot_url = plot_stocks(stock_watchlist)
     return render_template('dashboard.html', stocks=stocks_data,plot_url=plot_url)
@@ -8,16 +8,37 @@ import matplotlib.pyplot as plt
 
 def fetch_top_stocks():
     top_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'BRK-B', 'V', 'JNJ', 'WMT', 'JPM', 'PG', 'UNH', 'NVDA', 'HD', 'DIS', 'PYPL', 'MA', 'VZ', 'ADBE', 'NFLX', 'INTC', 'CMCSA', 'PFE', 'KO', 'PEP', 'T', 'MRK', 'ABT', 'CSCO', 'XOM', 'NKE', 'LLY', 'MCD', 'DHR', 'WFC', 'MDT', 'BMY', 'COST', 'NEE', 'META']
+    return fetch_stock_quotes(top_stocks)
+
+def fetch_stock_quotes(tickers):
+    # one batched download for every ticker instead of a Ticker() round trip each
+    tickers = [ticker.upper().strip() for ticker in tickers if ticker and ticker.strip()]
+    if not tickers:
+        return []
+    try:
+        history = yf.download(tickers=tickers, period='1d', group_by='ticker', auto_adjust=True, threads=True, progress=False)
+    except Exception as e:
+        print(f"Error fetching quotes: {str(e)}")
+        return [[] for ticker in tickers]
     stocks_data = []
-    for ticker in top_stocks:
-        stocks_data.append(fetch_stock_info(ticker))
+    for ticker in tickers:
+        if isinstance(history.columns, pd.MultiIndex):
+            if ticker not in history.columns.get_level_values(0):
+                stocks_data.append([])
+                continue
+            frame = history[ticker]
+        else:
+            frame = history
+        stocks_data.append(quote_from_history(ticker, frame.dropna(how='all')))
     return stocks_data
 
 def fetch_stock_info(ticker):
-    stock_data = []
     ticker = ticker.upper().strip()
     stock = yf.Ticker(ticker)
-    stock_info = stock.history(period='1d')
+    return quote_from_history(ticker, stock.history(period='1d'))
+
+def quote_from_history(ticker, stock_info):
+    stock_data = []
     if not stock_info.empty:
         row = stock_info.iloc[-1]
         price = row['Open']
@@ -0,0 +1,31 @@
+from datetime import date, datetime, timedelta
+
+from src.models import db, Budget, Expense, User
+from src.services.budget_alert import BudgetAlertService
+from src.services.spend_rollup import SpendRollupService
+
+
+def add_expense(user_id, amount, when):
+    expense = Expense(user_id=user_id, amount=amount, category='Housing', date=when, description='')
+    db.session.add(expense)
+    SpendRollupService.record_added(expense)
+
+
+def test_future_dated_expenses_do_not_count_yet(app):
+    user = User(username='budget', email='budget@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    now = datetime.now()
+    month_end = datetime.combine((now.replace(day=1) + timedelta(days=32)).replace(day=1), datetime.min.time())
+    db.session.add(Budget(user_id=user.id, category='Housing', amount=1000, month=date(now.year, now.month, 1)))
+    add_expense(user.id, 10, now.replace(day=1, hour=0, minute=0))
+    add_expense(user.id, 1200, month_end - timedelta(seconds=1))  # rent entered early
+    db.session.commit()
+
+    assert BudgetAlertService.check_budget_status(user.id) == []
+
+    # once its date has passed it counts like any other expense
+    db.session.query(Expense).filter_by(amount=1200).update({'date': now.replace(day=1, hour=0, minute=1)})
+    db.session.commit()
+    assert [alert['severity'] for alert in BudgetAlertService.check_budget_status(user.id)][0] == 'danger'
@@ -0,0 +1,59 @@
+import io
+from datetime import date
+
+from src.models import db, Budget, Expense, MonthlySpend, User
+from src.services.data_export import DataExportService
+from src.services.expense_import import ExpenseImportService
+
+
+def make_user(name):
+    user = User(username=name, email=f'{name}@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def stored(user_id):
+    expenses = sorted(
+        (expense.date, expense.amount, expense.category, expense.description)
+        for expense in Expense.query.filter_by(user_id=user_id)
+    )
+    rollup = sorted(
+        (row.category, row.month, round(row.total, 2), row.count)
+        for row in MonthlySpend.query.filter_by(user_id=user_id)
+    )
+    return expenses, rollup
+
+
+def test_export_round_trip(app):
+    source = make_user('source')
+    statement = (
+        'Date,Amount,Category,Description\n'
+        '2026-09-03,-42.50,Food,Lunch\n'
+        '2026-09-03,-42.50,Food,Lunch\n'
+        '2026-09-28,(1200.00),Housing,Rent\n'
+        '2026-10-01,-15.00,Transport,Metro\n'
+        '2026-10-02,500.00,Income,Refund\n'
+    )
+    report = ExpenseImportService().import_statement(source, io.BytesIO(statement.encode()), filename='bank.csv')
+    assert (report['imported'], report['skipped']) == (4, 1)
+
+    db.session.add(Budget(user_id=source, category='Food', amount=300, month=date(2026, 10, 1)))
+    db.session.commit()
+    exported = ''.join(DataExportService().stream(source, 'csv'))
+
+    target = make_user('target')
+    report = ExpenseImportService().import_statement(target, io.BytesIO(exported.encode()), filename='export.csv')
+    assert (report['imported'], report['skipped'], report['error_count']) == (4, 1, 0)
+    assert stored(target) == stored(source)
+
+
+def test_sign_convention(app):
+    user_id = make_user('signs')
+    statement = 'date,amount,category\n2026-10-01,-10,Food\n2026-10-02,25,Food\n'
+
+    report = ExpenseImportService().import_statement(
+        user_id, io.BytesIO(statement.encode()), filename='bank.csv', sign='positive_is_expense'
+    )
+    assert (report['imported'], report['skipped']) == (1, 1)
+    assert [expense.amount for expense in Expense.query.filter_by(user_id=user_id)] == [25.0]
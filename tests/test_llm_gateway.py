@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from src.services.llm_gateway import LLMGateway, LLMTimeout, StubGenerativeModel
+
+
+def open_breaker(gateway):
+    """Put the gateway's breaker straight into the half-open state."""
+    gateway._failures = gateway.failure_threshold
+    gateway._opened_at = time.monotonic() - gateway.reset_after - 1
+
+
+def test_stream_closed_early_frees_half_open_trial():
+    gateway = LLMGateway(StubGenerativeModel(latency=0.05, chunks=5), failure_threshold=1, reset_after=30)
+    open_breaker(gateway)
+    assert gateway.stats()['breaker'] == 'half-open'
+
+    chunks = gateway.stream('prompt')
+    assert next(chunks)
+    chunks.close()  # the SSE client went away mid-stream
+
+    assert gateway.stats()['abandoned'] == 1
+    # the next call is allowed through as the new trial and closes the breaker
+    assert ''.join(gateway.stream('prompt'))
+    assert gateway.stats()['breaker'] == 'closed'
+
+
+def test_stream_closed_early_releases_its_slot():
+    gateway = LLMGateway(StubGenerativeModel(latency=0.05, chunks=5), max_concurrency=1, queue_timeout=1)
+    chunks = gateway.stream('prompt')
+    next(chunks)
+    chunks.close()
+
+    assert gateway.generate('prompt')
+    stats = gateway.stats()
+    assert stats['succeeded'] == 1
+    assert stats['failed'] == 0
+
+
+def test_hung_call_gives_its_slot_back():
+    model = StubGenerativeModel(latency=5, chunks=1)
+    gateway = LLMGateway(model, max_concurrency=1, queue_timeout=0.5, timeout=0.2, retries=0)
+    # the caller's wait and the model's own deadline expire together; either may report it
+    with pytest.raises((LLMTimeout, TimeoutError)):
+        gateway.generate('prompt')
+
+    # the model call itself hit the deadline, so the slot is free again
+    model.latency = 0.01
+    assert gateway.generate('prompt')
+
+
+def test_stalled_stream_is_cancelled():
+    gateway = LLMGateway(StubGenerativeModel(latency=5, chunks=1), max_concurrency=1, queue_timeout=0.5,
+                         timeout=0.2, retries=0)
+    with pytest.raises((LLMTimeout, TimeoutError)):
+        list(gateway.stream('prompt'))
+
+    gateway.model.latency = 0.01
+    assert ''.join(gateway.stream('prompt'))
@@ -0,0 +1,99 @@
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.services.market_providers import MarketDataProvider
+from src.services.price_store import FIELDS, PriceStore
+
+
+class FakeUpstream(MarketDataProvider):
+    """Serves fixed daily bars per ticker; closes can be rewritten to mimic an adjustment."""
+
+    def __init__(self, closes):
+        self.bars = {ticker: self._bars(series) for ticker, series in closes.items()}
+        self.calls = []
+
+    @staticmethod
+    def _bars(closes):
+        index = pd.DatetimeIndex(
+            [pd.Timestamp(date.today() - timedelta(days=len(closes) - 1 - i)) for i in range(len(closes))],
+            name='Date'
+        )
+        return pd.DataFrame({field: closes for field in FIELDS}, index=index, dtype=float)
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        raise NotImplementedError
+
+    def download(self, tickers, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        self.calls.append((tuple(tickers), start, end))
+        frames = {}
+        for ticker in tickers:
+            bars = self.bars[ticker]
+            if start is not None:
+                bars = bars[bars.index >= pd.Timestamp(start)]
+            if end is not None:
+                bars = bars[bars.index < pd.Timestamp(end)]
+            frames[ticker] = bars
+        return pd.concat(frames, axis=1)
+
+    def info(self, symbol):
+        return {}
+
+
+def closes(store, ticker, days):
+    start = (date.today() - timedelta(days=days)).isoformat()
+    return store.download([ticker], start=start)[ticker]['Close'].tolist()
+
+
+def test_split_restates_stored_history(tmp_path):
+    upstream = FakeUpstream({'AAA': [100.0, 100.0, 100.0, 100.0]})
+    store = PriceStore(upstream, str(tmp_path / 'prices.db'), max_age=-1)
+    assert closes(store, 'AAA', 3) == [100.0] * 4
+
+    # a 10:1 split: upstream restates every past close and adds a new bar
+    upstream.bars['AAA'] = FakeUpstream._bars([10.0, 10.0, 10.0, 10.0, 10.0])
+    assert closes(store, 'AAA', 4) == [10.0] * 5
+    assert store.stats()['restated'] == 1
+
+
+def test_partial_last_bar_does_not_restate(tmp_path):
+    upstream = FakeUpstream({'AAA': [100.0, 100.0, 101.0]})
+    store = PriceStore(upstream, str(tmp_path / 'prices.db'), max_age=-1)
+    closes(store, 'AAA', 2)
+
+    # only today's bar moved, as it does during the session
+    upstream.bars['AAA'] = FakeUpstream._bars([100.0, 100.0, 103.0])
+    assert closes(store, 'AAA', 2) == [100.0, 100.0, 103.0]
+    assert store.stats()['restated'] == 0
+    assert upstream.calls[-1][1] == (date.today() - timedelta(days=1)).isoformat()
+
+
+def test_fresh_tickers_do_not_wait_for_another_fetch(tmp_path):
+    upstream = FakeUpstream({'AAA': [1.0, 2.0], 'BBB': [3.0, 4.0]})
+    store = PriceStore(upstream, str(tmp_path / 'prices.db'), max_age=3600)
+    closes(store, 'AAA', 1)
+
+    # hold BBB's first download open until AAA has been read
+    started, release = threading.Event(), threading.Event()
+    download = upstream.download
+
+    def slow_download(tickers, **kwargs):
+        if 'BBB' in tickers:
+            started.set()
+            release.wait(5)
+        return download(tickers, **kwargs)
+
+    upstream.download = slow_download
+    fetching = threading.Thread(target=closes, args=(store, 'BBB', 1))
+    fetching.start()
+    started.wait(5)
+    try:
+        reader = threading.Thread(target=closes, args=(store, 'AAA', 1))
+        reader.start()
+        reader.join(2)
+        assert not reader.is_alive()
+    finally:
+        release.set()
+        fetching.join()
+    assert len(upstream.calls) == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from src.services.query_plans import check_query_plans, explain, hot_queries
+
+# hot query -> the composite index its plan must use
+EXPECTED_INDEXES = {
+    'expenses_list': 'ix_expense_user_date',
+    'expenses_keyset_page': 'ix_expense_user_date',
+    'expenses_last_6_months': 'ix_expense_user_date',
+    'expenses_window_sum': 'ix_expense_user_date',
+    'expenses_category_window': 'ix_expense_user_category_date',
+    'context_recent_expenses': 'ix_expense_user_date',
+    'budgets_since': 'ix_budget_user_month',
+    'goals': 'ix_goal_user_target_date',
+}
+
+
+@pytest.mark.parametrize('name, index', sorted(EXPECTED_INDEXES.items()))
+def test_hot_query_uses_composite_index(app, name, index):
+    plan = explain(hot_queries()[name])
+    assert any(index in line for line in plan), plan
+
+
+def test_no_hot_query_scans_a_table(app):
+    scans = {name: lines for name, (plan, lines) in check_query_plans().items() if lines}
+    assert scans == {}